@@ -0,0 +1,14 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite, в которой транзакции начинаются с BEGIN IMMEDIATE.
+
+    Отложенная транзакция, уже прочитавшая данные, при первой записи
+    получает database is locked сразу, не дожидаясь busy_timeout.
+    IMMEDIATE берёт блокировку на запись в начале транзакции, и
+    писатели по очереди ждут друг друга.
+    """
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
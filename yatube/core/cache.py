@@ -0,0 +1,200 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+LOCAL_MAX_BYTES = 16 * 1024 * 1024
+LOCAL_TIMEOUT = 60
+# Под этими префиксами лежат только неизменяемые значения: версия
+# содержимого входит в сам ключ (поколения страниц, версия карточки).
+LOCAL_PREFIXES = ('page:', 'post_card:')
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LocalStore:
+    """LRU в памяти процесса, ограниченный суммарным размером
+    сериализованных значений. Общий для всех потоков процесса."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.monotonic():
+                self._pop(key)
+                return None
+            self.entries.move_to_end(key)
+        return data
+
+    def set(self, key, data, timeout):
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            self._pop(key)
+            self.entries[key] = (time.monotonic() + timeout, data)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self.entries)))
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+def get_store(name, max_bytes):
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = LocalStore(max_bytes)
+        return _stores[name]
+
+
+class TwoTierCache(BaseCache):
+    """Кеш из двух уровней: LRU в памяти процесса перед общим для
+    всех процессов кешем (алиас OPTIONS['SHARED']).
+
+    В локальный уровень попадают только ключи с префиксами
+    LOCAL_PREFIXES: их значения не меняются, поэтому копия в памяти
+    процесса не может устареть. Счётчики поколений и остальные ключи
+    всегда читаются из общего кеша, так что сброс страниц в одном
+    процессе сразу виден во всех остальных.
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__(params)
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_prefixes = tuple(
+            options.get('LOCAL_PREFIXES', LOCAL_PREFIXES)
+        )
+        self.local_timeout = options.get('LOCAL_TIMEOUT', LOCAL_TIMEOUT)
+        self.local = get_store(
+            location or self.shared_alias,
+            options.get('LOCAL_MAX_BYTES', LOCAL_MAX_BYTES),
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return key.startswith(self.local_prefixes)
+
+    def local_key(self, key, version):
+        return self.make_key(key, version=version)
+
+    def remember(self, key, value, version, timeout=DEFAULT_TIMEOUT):
+        # get_backend_timeout() у FileBasedCache возвращает абсолютное
+        # время, поэтому относительный таймаут вычисляется здесь.
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.shared.default_timeout
+        if timeout is not None and timeout <= 0:
+            return
+        if timeout is None or timeout > self.local_timeout:
+            timeout = self.local_timeout
+        self.local.set(
+            self.local_key(key, version),
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            timeout,
+        )
+
+    def recall(self, key, version):
+        data = self.local.get(self.local_key(key, version))
+        return None if data is None else pickle.loads(data)
+
+    def get(self, key, default=None, version=None):
+        if not self.is_local(key):
+            return self.shared.get(key, default, version=version)
+        value = self.recall(key, version)
+        if value is not None:
+            return value
+        value = self.shared.get(key, version=version)
+        if value is None:
+            return default
+        self.remember(key, value, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remote = []
+        for key in keys:
+            value = self.recall(key, version) if self.is_local(key) else None
+            if value is None:
+                remote.append(key)
+            else:
+                found[key] = value
+        if remote:
+            fetched = self.shared.get_many(remote, version=version)
+            for key, value in fetched.items():
+                if self.is_local(key):
+                    self.remember(key, value, version)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if self.is_local(key):
+            self.remember(key, value, version, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if self.is_local(key) and key not in (failed or ()):
+                self.remember(key, value, version, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added and self.is_local(key):
+            self.remember(key, value, version, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self.local_key(key, version))
+        self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if (self.is_local(key)
+                and self.recall(key, version) is not None):
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарность определяется общим кешем: у FileBasedCache это
+        get и set, и одновременные вызовы могут потерять приращение."""
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
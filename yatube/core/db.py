@@ -0,0 +1,41 @@
+import time
+from functools import partial, wraps
+
+from django.db import OperationalError, transaction
+
+from .middleware import SAFE_METHODS
+
+
+BUSY_RETRIES = 3
+BUSY_RETRY_DELAY = 0.05
+
+
+def is_busy(error):
+    return 'database is locked' in str(error)
+
+
+def retry_on_busy(view=None, *, safe_methods=False):
+    """Повторяет изменяющее представление, если SQLite занята другим
+    писателем. busy_timeout тут не помогает: отложенная транзакция,
+    которая уже читала, при переходе к записи получает ошибку сразу.
+    Представление выполняется в транзакции, поэтому при повторе
+    частично записанные данные откатываются. Безопасные запросы
+    ничего не пишут и выполняются как есть: иначе при BEGIN IMMEDIATE
+    каждая страница с формой захватывала бы блокировку записи.
+    safe_methods=True нужен представлениям, которые пишут и на GET."""
+    if view is None:
+        return partial(retry_on_busy, safe_methods=safe_methods)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS and not safe_methods:
+            return view(request, *args, **kwargs)
+        for attempt in range(BUSY_RETRIES + 1):
+            try:
+                with transaction.atomic():
+                    return view(request, *args, **kwargs)
+            except OperationalError as error:
+                if attempt == BUSY_RETRIES or not is_busy(error):
+                    raise
+            time.sleep(BUSY_RETRY_DELAY * 2 ** attempt)
+    return wrapper
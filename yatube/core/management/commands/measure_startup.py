@@ -0,0 +1,117 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.warmup import WARMUP_URLS
+
+
+# Выполняется в новом процессе: время загрузки yatube.wsgi (вместе
+# с прогревом, если он включён) и первых запросов к страницам.
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from yatube.wsgi import application
+startup = time.perf_counter() - start
+from core.warmup import get
+requests = {}
+for path in json.loads(sys.argv[1]):
+    start = time.perf_counter()
+    status = get(application, path)
+    requests[path] = (time.perf_counter() - start, status)
+print(json.dumps({'startup': startup, 'requests': requests}))
+'''
+MODES = {'cold': '0', 'warm': '1'}
+
+
+class Command(BaseCommand):
+    help = ('Замеряет холодный старт воркера: время загрузки yatube.wsgi '
+            'и первых запросов в новых процессах без прогрева и с ним.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help='Сколько процессов запускать для каждого режима.',
+        )
+        parser.add_argument(
+            '--urls', default=','.join(WARMUP_URLS),
+            help='Имена маршрутов первых запросов через запятую.',
+        )
+        parser.add_argument('--output', help='Сохранить результаты в JSON.')
+
+    def handle(self, *args, **options):
+        paths = [reverse(name) for name in options['urls'].split(',') if name]
+        results = {
+            mode: self.measure(paths, warmup, options['runs'])
+            for mode, warmup in MODES.items()
+        }
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+
+    def probe(self, paths, warmup):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'yatube.settings'
+            ),
+            YATUBE_WARMUP=warmup,
+        )
+        process = subprocess.run(
+            [sys.executable, '-c', PROBE, json.dumps(paths)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if process.returncode:
+            raise CommandError(process.stderr)
+        return json.loads(process.stdout.splitlines()[-1])
+
+    def measure(self, paths, warmup, runs):
+        """Медианы по runs процессам, в миллисекундах."""
+        probes = [self.probe(paths, warmup) for _ in range(runs)]
+
+        def median(values):
+            return round(statistics.median(values) * 1000, 1)
+
+        requests = {
+            path: median([probe['requests'][path][0] for probe in probes])
+            for path in paths
+        }
+        return {
+            'runs': runs,
+            'startup_ms': median([probe['startup'] for probe in probes]),
+            'requests_ms': requests,
+            'first_response_ms': median([
+                probe['startup'] + probe['requests'][paths[0]][0]
+                for probe in probes
+            ]),
+            'errors': sum(
+                status >= 500
+                for probe in probes for _, status in probe['requests'].values()
+            ),
+        }
+
+    def report(self, results):
+        paths = list(results['cold']['requests_ms'])
+        self.stdout.write(
+            f'{"":<24}' + ''.join(f'{mode:>12}' for mode in results)
+        )
+        rows = [
+            ('загрузка, мс', 'startup_ms'),
+            ('первый ответ, мс', 'first_response_ms'),
+            ('ошибки 5xx', 'errors'),
+        ]
+        for label, key in rows:
+            self.stdout.write(f'{label:<24}' + ''.join(
+                f'{result[key]:>12}' for result in results.values()
+            ))
+        for path in paths:
+            self.stdout.write(f'{path:<24}' + ''.join(
+                f'{result["requests_ms"][path]:>12}'
+                for result in results.values()
+            ))
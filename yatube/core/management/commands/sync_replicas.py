@@ -0,0 +1,58 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.routers import get_replicas, mark_synced
+
+
+def copy_database(alias, target):
+    """Копирует базу SQLite целиком через backup API: копия
+    согласованная, даже если в основную базу идёт запись."""
+    connection = connections[alias]
+    if connection.in_atomic_block:
+        # Открытая транзакция держит блокировку, и backup ждал бы
+        # её бесконечно.
+        raise CommandError('Нельзя копировать базу внутри транзакции.')
+    connection.ensure_connection()
+    destination = sqlite3.connect(target)
+    try:
+        connection.connection.backup(destination)
+    finally:
+        destination.close()
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики DATABASE_REPLICAS. '
+            'Для локальной проверки маршрутизации чтений; у боевых СУБД '
+            'реплики обновляет их собственная репликация.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять синхронизацию каждые N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Синхронизация реплик есть только для SQLite.')
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError('Реплики не настроены: YATUBE_DB_REPLICAS.')
+        while True:
+            start = time.perf_counter()
+            for alias in replicas:
+                connections[alias].close()
+                copy_database(
+                    DEFAULT_DB_ALIAS, connections[alias].settings_dict['NAME']
+                )
+                mark_synced(alias)
+            self.stdout.write(
+                f'Реплики обновлены за {time.perf_counter() - start:.2f} с: '
+                + ', '.join(replicas)
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,62 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = ('Сводка профилировщика шаблонов по всем процессам: самые '
+            'дорогие шаблоны и теги и стеки в формате folded для '
+            'flamegraph.pl и speedscope.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            default=settings.TEMPLATE_PROFILE_DIR,
+            help='Каталог со стеками (по умолчанию TEMPLATE_PROFILE_DIR).',
+        )
+        parser.add_argument(
+            '--output',
+            help='Записать суммарные стеки в этот файл.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Сколько кадров вывести в сводке.',
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Удалить накопленные стеки после отчёта.',
+        )
+
+    def handle(self, *args, **options):
+        directory = options['dir']
+        if not directory or not os.path.isdir(directory):
+            raise CommandError(
+                'Профилировщик выключен: задайте YATUBE_TEMPLATE_PROFILE '
+                'или --dir.'
+            )
+        samples, requests = profiling.read_profiles(directory)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.writelines(
+                    f'{stack} {value}\n'
+                    for stack, value in sorted(samples.items())
+                )
+        total = sum(samples.values()) or 1
+        self.stdout.write(f'Запросов: {sum(requests.values())}')
+        for view, count in sorted(requests.items()):
+            self.stdout.write(f'  {view}: {count}')
+        inclusive, exclusive = profiling.frame_totals(samples)
+        self.stdout.write(f'{"всего, мс":>12} {"своё, мс":>12} {"%":>6}  кадр')
+        for frame, value in sorted(
+            inclusive.items(), key=lambda item: item[1], reverse=True
+        )[:options['top']]:
+            self.stdout.write(
+                f'{value / 1000:12.1f} {exclusive[frame] / 1000:12.1f} '
+                f'{value / total * 100:6.1f}  {frame}'
+            )
+        if options['reset']:
+            for path in profiling.profile_files(directory):
+                os.remove(path)
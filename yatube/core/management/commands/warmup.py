@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = ('Прогревает процесс: компилирует шаблоны, собирает маршруты, '
+            'импортирует бэкенды картинок и заполняет кеш главных '
+            'страниц. В воркерах то же делает yatube/wsgi.py при '
+            'WARMUP_ON_START.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-pages', action='store_true',
+            help='Не запрашивать страницы (без обращений к БД и кешу).',
+        )
+
+    def handle(self, *args, **options):
+        for name, result, seconds in warm_up(pages=not options['no_pages']):
+            self.stdout.write(
+                f'{name:<10}{seconds * 1000:>10.1f} мс  {result}'
+            )
@@ -0,0 +1,174 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.template.backends import django as django_backend
+
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_local = threading.local()
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    """Накопленные метрики процесса по представлениям."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.latency = defaultdict(Histogram)
+        self.queries = defaultdict(int)
+        self.db_time = defaultdict(float)
+        self.template_time = defaultdict(float)
+        self.cache = defaultdict(int)
+
+    def record(self, view, duration, stats):
+        with self.lock:
+            self.latency[view].observe(duration)
+            self.queries[view] += stats.queries
+            self.db_time[view] += stats.db_time
+            self.template_time[view] += stats.template_time
+            self.cache['hit'] += stats.cache_hits
+            self.cache['miss'] += stats.cache_misses
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        with self.lock:
+            lines = [
+                '# HELP yatube_request_duration_seconds '
+                'Время обработки запроса.',
+                '# TYPE yatube_request_duration_seconds histogram',
+            ]
+            for view, histogram in sorted(self.latency.items()):
+                label = f'view="{view}"'
+                for bound, count in histogram.cumulative():
+                    lines.append(
+                        f'yatube_request_duration_seconds_bucket'
+                        f'{{{label},le="{bound}"}} {count}'
+                    )
+                lines += [
+                    f'yatube_request_duration_seconds_bucket'
+                    f'{{{label},le="+Inf"}} {histogram.count}',
+                    f'yatube_request_duration_seconds_sum'
+                    f'{{{label}}} {histogram.sum}',
+                    f'yatube_request_duration_seconds_count'
+                    f'{{{label}}} {histogram.count}',
+                ]
+            for name, help_text, values in (
+                ('yatube_db_queries_total', 'Число запросов к БД.',
+                 self.queries),
+                ('yatube_db_duration_seconds_total',
+                 'Время выполнения запросов к БД.', self.db_time),
+                ('yatube_template_duration_seconds_total',
+                 'Время рендеринга шаблонов.', self.template_time),
+            ):
+                lines += [
+                    f'# HELP {name} {help_text}',
+                    f'# TYPE {name} counter',
+                ]
+                lines += [
+                    f'{name}{{view="{view}"}} {value}'
+                    for view, value in sorted(values.items())
+                ]
+            lines += [
+                '# HELP yatube_cache_requests_total '
+                'Обращения к кешу страниц.',
+                '# TYPE yatube_cache_requests_total counter',
+            ]
+            lines += [
+                f'yatube_cache_requests_total{{result="{result}"}} {value}'
+                for result, value in sorted(self.cache.items())
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def start_request():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def finish_request():
+    return _local.__dict__.pop('stats', None)
+
+
+def current():
+    return getattr(_local, 'stats', None)
+
+
+def record_cache(hit):
+    stats = current()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+def query_timer(execute, sql, params, many, context):
+    stats = current()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - start
+
+
+def instrument_templates():
+    """Оборачивает рендеринг шаблонов бэкенда Django замером времени."""
+    template_class = django_backend.Template
+    if getattr(template_class.render, 'instrumented', False):
+        return
+    render = template_class.render
+
+    def timed_render(self, context=None, request=None):
+        stats = current()
+        start = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            if stats is not None:
+                stats.template_time += time.perf_counter() - start
+
+    timed_render.instrumented = True
+    template_class.render = timed_render
@@ -0,0 +1,105 @@
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, profiling, routers
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_COOKIE = 'use_primary'
+
+
+class PerformanceMiddleware:
+    """Собирает время ответа, запросы к БД, время шаблонов и
+    попадания в кеш; отдаёт их в заголовке Server-Timing."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.instrument_templates()
+
+    def __call__(self, request):
+        stats = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.query_timer)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request()
+        duration = time.perf_counter() - start
+        view = 'unresolved'
+        if request.resolver_match is not None:
+            view = request.resolver_match.view_name
+        metrics.registry.record(view, duration, stats)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};'
+            f'desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'cache;desc="{stats.cache_hits} hits, '
+            f'{stats.cache_misses} misses"',
+            f'total;dur={duration * 1000:.1f}',
+        ])
+        return response
+
+
+class ReplicaMiddleware:
+    """Безопасные запросы читают с реплик. После запроса, который
+    записал в БД, клиент на DATABASE_REPLICA_LAG секунд получает
+    cookie, с которой его запросы читают с основной БД и видят его же
+    изменения. Запись определяется по маршрутизатору, а не по методу:
+    подписка на автора, например, выполняется GET-запросом."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (request.method not in SAFE_METHODS
+                or PRIMARY_COOKIE in request.COOKIES):
+            block = routers.use_primary()
+        else:
+            block = routers.read_only()
+        with block:
+            response = self.get_response(request)
+            wrote = routers.has_written()
+        if wrote and routers.get_replicas():
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_LAG,
+                httponly=True,
+            )
+        return response
+
+
+class TemplateProfilerMiddleware:
+    """Профилировщик шаблонов, включается настройкой
+    TEMPLATE_PROFILE_DIR. Стеки шаблонов и тегов каждого запроса
+    дописываются в каталог, отчёт строит команда template_profile."""
+
+    def __init__(self, get_response):
+        self.directory = getattr(settings, 'TEMPLATE_PROFILE_DIR', None)
+        if not self.directory:
+            raise MiddlewareNotUsed
+        os.makedirs(self.directory, exist_ok=True)
+        self.get_response = get_response
+        profiling.instrument_templates()
+
+    def __call__(self, request):
+        profile = profiling.start_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiling.finish_request()
+        duration = time.perf_counter() - start
+        view = 'unresolved'
+        if request.resolver_match is not None:
+            view = request.resolver_match.view_name
+        profiling.write_profile(self.directory, view, profile, duration)
+        return response
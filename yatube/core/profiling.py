@@ -0,0 +1,144 @@
+import glob
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.template import base
+
+
+PROFILE_PATTERN = 'templates-*.folded'
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+class TemplateProfile:
+    """Время шаблонов и тегов одного запроса по стекам вызовов.
+
+    samples - собственное время каждого стека без вложенных кадров,
+    как в формате folded stacks для flamegraph.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.samples = defaultdict(float)
+
+    def enter(self, name):
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, start, children = self.stack[-1]
+        elapsed = time.perf_counter() - start
+        key = ';'.join(frame[0] for frame in self.stack)
+        self.stack.pop()
+        self.samples[key] += elapsed - children
+        if self.stack:
+            self.stack[-1][2] += elapsed
+        return elapsed
+
+
+def start_request():
+    _local.profile = TemplateProfile()
+    return _local.profile
+
+
+def finish_request():
+    return _local.__dict__.pop('profile', None)
+
+
+def current():
+    return getattr(_local, 'profile', None)
+
+
+def node_name(node):
+    name = getattr(node, '_profile_name', None)
+    if name is None:
+        token = getattr(node, 'token', None)
+        tag = token.contents.split(None, 1)[0] if token else ''
+        name = f'{{% {tag or type(node).__name__} %}}'
+        node._profile_name = name
+    return name
+
+
+def profiled(render, get_name):
+    def wrapper(self, *args, **kwargs):
+        profile = current()
+        if profile is None:
+            return render(self, *args, **kwargs)
+        name = get_name(self)
+        if name is None:
+            return render(self, *args, **kwargs)
+        profile.enter(name)
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.exit()
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_templates():
+    """Оборачивает рендеринг шаблонов и узлов тегов замером времени.
+
+    Текст и переменные шаблона не считаются отдельными кадрами:
+    их время входит в собственное время шаблона или тега.
+    """
+    if getattr(base.Template._render, 'instrumented', False):
+        return
+    base.Template._render = profiled(
+        base.Template._render, lambda template: template.name or '<string>'
+    )
+    skipped = (base.TextNode, base.VariableNode)
+    base.Node.render_annotated = profiled(
+        base.Node.render_annotated,
+        lambda node: None if isinstance(node, skipped) else node_name(node),
+    )
+
+
+def write_profile(directory, root, profile, duration):
+    """Дописывает стеки запроса в файл процесса. Собственное время
+    представления вне шаблонов приходится на корневой кадр root."""
+    view_time = max(duration - sum(profile.samples.values()), 0)
+    lines = [
+        f'{root};{stack} {round(seconds * 1e6)}\n'
+        for stack, seconds in profile.samples.items()
+    ]
+    lines.append(f'{root} {round(view_time * 1e6)}\n')
+    path = os.path.join(directory, f'templates-{os.getpid()}.folded')
+    with _write_lock, open(path, 'a', encoding='utf-8') as file:
+        file.writelines(lines)
+
+
+def profile_files(directory):
+    return sorted(glob.glob(os.path.join(directory, PROFILE_PATTERN)))
+
+
+def read_profiles(directory):
+    """Суммирует стеки всех процессов: {стек: микросекунды}
+    и {корневой кадр: число запросов}."""
+    samples = defaultdict(int)
+    requests = defaultdict(int)
+    for path in profile_files(directory):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                stack, _, value = line.rstrip('\n').rpartition(' ')
+                if not stack:
+                    continue
+                samples[stack] += int(value)
+                if ';' not in stack:
+                    requests[stack] += 1
+    return samples, requests
+
+
+def frame_totals(samples):
+    """Полное и собственное время каждого кадра по всем стекам."""
+    inclusive = defaultdict(int)
+    exclusive = defaultdict(int)
+    for stack, value in samples.items():
+        frames = stack.split(';')
+        exclusive[frames[-1]] += value
+        for frame in set(frames):
+            inclusive[frame] += value
+    return inclusive, exclusive
@@ -0,0 +1,100 @@
+import random
+import secrets
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+_state = threading.local()
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def sync_key(alias):
+    return f'replica_sync:{alias}'
+
+
+def mark_synced(alias):
+    """Отмечает новую синхронизацию реплики: страницы, собранные
+    по её прежнему снимку, перестают браться из кеша."""
+    cache.set(sync_key(alias), secrets.randbits(64), None)
+
+
+@contextmanager
+def read_only():
+    """Чтения внутри блока уходят на реплику до первой записи:
+    после неё блок читает с основной БД, чтобы видеть свои же
+    изменения. Реплика выбирается одна на весь блок, и все запросы
+    страницы видят один снимок данных."""
+    replicas = get_replicas()
+    previous = getattr(_state, 'replica', None), getattr(
+        _state, 'wrote', False
+    )
+    _state.replica = random.choice(replicas) if replicas else None
+    _state.wrote = False
+    try:
+        yield
+    finally:
+        _state.replica, _state.wrote = previous
+
+
+@contextmanager
+def use_primary():
+    previous = getattr(_state, 'replica', None), getattr(
+        _state, 'wrote', False
+    )
+    _state.replica, _state.wrote = None, False
+    try:
+        yield
+    finally:
+        _state.replica, _state.wrote = previous
+
+
+def has_written():
+    """Была ли запись с начала текущего блока read_only() или
+    use_primary()."""
+    return getattr(_state, 'wrote', False)
+
+
+def current_replica():
+    """Реплика, с которой сейчас идут чтения, или None."""
+    if has_written():
+        return None
+    return getattr(_state, 'replica', None)
+
+
+def replica_position():
+    """Отметка последней синхронизации текущей реплики или None,
+    если чтения идут с основной БД."""
+    alias = current_replica()
+    if alias is None:
+        return None
+    return alias, cache.get(sync_key(alias))
+
+
+class ReplicaRouter:
+    """Направляет чтения в блоке read_only() на выбранную в нём
+    реплику из DATABASE_REPLICAS, всё остальное - на основную БД.
+
+    Вне запросов (команды, фоновые потоки) чтения идут на основную
+    БД: там реплика может отставать от только что записанных данных.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными при синхронизации.
+        return db not in get_replicas()
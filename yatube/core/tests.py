@@ -0,0 +1,369 @@
+import importlib
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from core import metrics
+from core.cache import LocalStore
+from core.db import BUSY_RETRIES, retry_on_busy
+from core.management.commands.sync_replicas import copy_database
+from core.middleware import PRIMARY_COOKIE, ReplicaMiddleware
+from core.routers import ReplicaRouter, read_only
+from core.warmup import WARMUP_URLS, warm_up
+from posts.models import Post, User
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+        metrics.registry.reset()
+        cache.clear()
+
+    def test_server_timing_header(self):
+        """Ответ содержит заголовок Server-Timing с замерами."""
+        response = self.guest_client.get(reverse('posts:index'))
+        server_timing = response['Server-Timing']
+        for metric in ('db;dur=', 'queries', 'tpl;dur=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, server_timing)
+
+    def test_metrics_endpoint(self):
+        """Метрики представлений отдаются в формате Prometheus."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        expected_lines = [
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 2',
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            'yatube_cache_requests_total{result="hit"} 1',
+            'yatube_cache_requests_total{result="miss"} 1',
+        ]
+        for line in expected_lines:
+            with self.subTest(line=line):
+                self.assertContains(response, line)
+        self.assertContains(
+            response, 'yatube_db_queries_total{view="posts:index"}'
+        )
+        self.assertContains(
+            response, 'yatube_template_duration_seconds_total'
+        )
+
+    def test_metrics_hidden_from_external_clients(self):
+        """Метрики недоступны с внешних адресов."""
+        response = self.guest_client.get(
+            reverse('metrics'), REMOTE_ADDR='203.0.113.1'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class TwoTierCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.location = tempfile.mkdtemp()
+        cls.settings_override = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'core.cache.TwoTierCache',
+                'OPTIONS': {'SHARED': 'shared'},
+            },
+            'shared': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cls.location,
+            },
+        })
+        cls.settings_override.enable()
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.location)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versioned_keys_served_from_memory(self):
+        """Неизменяемые ключи читаются из памяти процесса, остальные
+        всегда из общего кеша."""
+        cache.set('page:test', 'page')
+        cache.set('generation:test', 1)
+        with mock.patch.object(
+            caches['shared'], 'get', wraps=caches['shared'].get
+        ) as shared_get:
+            self.assertEqual(cache.get('page:test'), 'page')
+            self.assertEqual(cache.get('generation:test'), 1)
+        self.assertEqual(shared_get.call_count, 1)
+
+    def test_expired_keys_not_kept_in_memory(self):
+        """Значения с нулевым таймаутом не остаются в памяти
+        процесса."""
+        cache.set('page:expired', 'page', 0)
+        self.assertIsNone(cache.get('page:expired'))
+        cache.set('page:test', 'page')
+        self.assertEqual(cache.get('page:test'), 'page')
+
+    def test_local_store_bounded(self):
+        """Локальный LRU вытесняет давно не читанные значения при
+        превышении лимита памяти."""
+        store = LocalStore(max_bytes=10)
+        store.set('first', b'12345', 60)
+        store.set('second', b'12345', 60)
+        store.get('first')
+        store.set('third', b'12345', 60)
+        self.assertEqual(store.get('first'), b'12345')
+        self.assertIsNone(store.get('second'))
+        self.assertLessEqual(store.size, 10)
+
+    def test_invalidation_from_other_process(self):
+        """Сброс поколения в другом процессе сбрасывает страницу,
+        закешированную в памяти этого процесса."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.bulk_create(
+            [Post(author=self.author, text='Imported post text')]
+        )
+        self.assertNotContains(self.client.get(url), 'Imported post text')
+        subprocess.run(
+            [
+                sys.executable, 'manage.py', 'shell', '-c',
+                'from posts.caching import POSTS_SCOPE, bump; '
+                'bump(POSTS_SCOPE)',
+            ],
+            cwd=settings.BASE_DIR,
+            env=dict(
+                os.environ,
+                YATUBE_CACHE_BACKEND='file',
+                YATUBE_CACHE_LOCATION=self.location,
+            ),
+            check=True,
+        )
+        self.assertContains(self.client.get(url), 'Imported post text')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def routed_read(self, request, write=False):
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            return HttpResponse(self.router.db_for_read(Post))
+
+        return ReplicaMiddleware(view)(request)
+
+    def test_router(self):
+        """Чтения в read_only() идут на реплику до первой записи,
+        вне его - на основную БД."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with read_only():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+    @override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+    def test_one_replica_per_block(self):
+        """Все чтения блока read_only() идут на одну реплику."""
+        for _ in range(10):
+            with read_only():
+                aliases = {self.router.db_for_read(Post) for _ in range(10)}
+            self.assertEqual(len(aliases), 1)
+
+    def test_read_your_writes(self):
+        """После изменяющего запроса клиент читает с основной БД."""
+        factory = RequestFactory()
+        response = self.routed_read(factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        response = self.routed_read(factory.post('/'), write=True)
+        self.assertEqual(response.content, b'default')
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        request = factory.get('/')
+        request.COOKIES[PRIMARY_COOKIE] = '1'
+        self.assertEqual(self.routed_read(request).content, b'default')
+
+    def test_cookie_follows_writes(self):
+        """Cookie ставится после любого запроса с записью, в том
+        числе GET, и не ставится запросам без записи."""
+        factory = RequestFactory()
+        response = self.routed_read(factory.get('/'), write=True)
+        self.assertEqual(response.content, b'default')
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        response = self.routed_read(factory.post('/'))
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+
+class ReplicaSyncTests(TransactionTestCase):
+    def test_copy_database(self):
+        """Синхронизация копирует основную базу SQLite в файл
+        реплики."""
+        author = User.objects.create_user(username='test_author')
+        Post.objects.create(author=author, text='Test post text')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        target = os.path.join(directory, 'replica.sqlite3')
+        copy_database('default', target)
+        replica = sqlite3.connect(target)
+        self.addCleanup(replica.close)
+        self.assertEqual(
+            replica.execute('SELECT text FROM posts_post').fetchall(),
+            [('Test post text',)],
+        )
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_page_cache_follows_replica(self):
+        """Страница, прочитанная с отстающей реплики, не остаётся в
+        кеше после её синхронизации."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        connections.databases['replica'] = dict(
+            connections.databases['default'],
+            NAME=os.path.join(directory, 'replica.sqlite3'),
+        )
+        self.addCleanup(connections.databases.pop, 'replica')
+        self.addCleanup(lambda: connections['replica'].close())
+        cache.clear()
+        call_command('sync_replicas', stdout=StringIO())
+        author = User.objects.create_user(username='test_author')
+        Post.objects.create(author=author, text='Replicated post text')
+        url = reverse('posts:index')
+        self.assertNotContains(self.client.get(url), 'Replicated post text')
+        call_command('sync_replicas', stdout=StringIO())
+        self.assertContains(self.client.get(url), 'Replicated post text')
+
+
+class SqliteTuningTests(TestCase):
+    def test_pragmas_applied(self):
+        """Настройки SQLITE_PRAGMAS применяются к соединению."""
+        with connection.cursor() as cursor:
+            for pragma, expected in (('busy_timeout', 5000),
+                                     ('synchronous', 1)):
+                with self.subTest(pragma=pragma):
+                    cursor.execute(f'PRAGMA {pragma}')
+                    self.assertEqual(cursor.fetchone()[0], expected)
+
+    def test_retry_on_busy(self):
+        """Занятая база приводит к повтору представления, другие
+        ошибки - нет."""
+        view = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'response'
+        ])
+        request = RequestFactory().post('/')
+        with mock.patch('core.db.time.sleep'):
+            self.assertEqual(retry_on_busy(view)(request), 'response')
+            self.assertEqual(view.call_count, 2)
+            view = mock.Mock(
+                side_effect=OperationalError('database is locked')
+            )
+            with self.assertRaises(OperationalError):
+                retry_on_busy(view)(request)
+            self.assertEqual(view.call_count, BUSY_RETRIES + 1)
+            view = mock.Mock(side_effect=OperationalError('no such table'))
+            with self.assertRaises(OperationalError):
+                retry_on_busy(view)(request)
+            self.assertEqual(view.call_count, 1)
+
+    def test_retry_on_busy_skips_safe_methods(self):
+        """GET выполняется без транзакции и без повторов."""
+        view = mock.Mock(side_effect=OperationalError('database is locked'))
+        with mock.patch('core.db.transaction.atomic') as atomic:
+            with self.assertRaises(OperationalError):
+                retry_on_busy(view)(RequestFactory().get('/'))
+        atomic.assert_not_called()
+        self.assertEqual(view.call_count, 1)
+
+
+class TemplateProfilerTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        cache.clear()
+
+    def test_profile_report(self):
+        """Профилировщик пишет стеки шаблонов запросов, команда
+        template_profile суммирует их в отчёт и файл folded."""
+        with override_settings(TEMPLATE_PROFILE_DIR=self.directory):
+            client = Client()
+            client.get(reverse('posts:index'))
+            client.get(reverse('about:author'))
+        output = os.path.join(self.directory, 'report.folded')
+        stdout = StringIO()
+        call_command(
+            'template_profile', dir=self.directory, output=output,
+            reset=True, stdout=stdout,
+        )
+        self.assertIn('Запросов: 2', stdout.getvalue())
+        self.assertIn('posts:index: 1', stdout.getvalue())
+        with open(output, encoding='utf-8') as file:
+            stacks = [line.rpartition(' ')[0] for line in file]
+        self.assertIn(
+            'posts:index;posts/index.html;{% extends %};base.html', stacks
+        )
+        self.assertIn('posts:index', stacks)
+        self.assertEqual(os.listdir(self.directory), ['report.folded'])
+
+
+class WarmupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_up(self):
+        """Прогрев компилирует шаблоны, проверяет маршруты posts
+        и заполняет кеш главных страниц."""
+        results = {name: result for name, result, _ in warm_up()}
+        self.assertGreater(results['templates'], 0)
+        self.assertGreater(results['urls'], 0)
+        self.assertIn('ThumbnailBackend', results['imports'])
+        self.assertEqual(results['pages'], len(WARMUP_URLS))
+        with self.assertNumQueries(0):
+            response = Client().get(reverse('posts:index'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_production_settings(self):
+        """В боевых настройках шаблоны берутся из кешируемого
+        загрузчика, базовые настройки при этом не меняются, а без
+        YATUBE_SECRET_KEY настройки не загружаются."""
+        with mock.patch.dict(os.environ):
+            os.environ.pop('YATUBE_SECRET_KEY', None)
+            sys.modules.pop('yatube.settings_production', None)
+            with self.assertRaises(KeyError):
+                importlib.import_module('yatube.settings_production')
+            os.environ['YATUBE_SECRET_KEY'] = 'production-secret'
+            sys.modules.pop('yatube.settings_production', None)
+            settings_production = importlib.import_module(
+                'yatube.settings_production'
+            )
+        self.assertEqual(settings_production.SECRET_KEY, 'production-secret')
+        options = settings_production.TEMPLATES[0]['OPTIONS']
+        self.assertFalse(settings_production.DEBUG)
+        self.assertEqual(
+            options['loaders'][0][0], 'django.template.loaders.cached.Loader'
+        )
+        self.assertNotIn(
+            'django.template.context_processors.debug',
+            options['context_processors'],
+        )
+        self.assertIn(
+            'django.template.context_processors.debug',
+            settings.TEMPLATES[0]['OPTIONS']['context_processors'],
+        )
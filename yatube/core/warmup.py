@@ -0,0 +1,168 @@
+import io
+import logging
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+from django.urls import URLResolver, get_resolver, resolve, reverse
+from django.urls.converters import IntConverter
+
+
+logger = logging.getLogger(__name__)
+
+# Страницы, которые открывают первыми: их кеш заполняется до того,
+# как воркер начнёт принимать запросы.
+WARMUP_URLS = ('posts:index', 'posts:trending', 'posts:group_index')
+
+
+def template_names(engine):
+    directories = [*engine.engine.dirs, *get_app_template_dirs('templates')]
+    names = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if not file.startswith('.'):
+                    path = os.path.join(root, file)
+                    names.add(os.path.relpath(path, directory))
+    return sorted(names)
+
+
+def warm_templates():
+    """Компилирует все шаблоны. С кешируемым загрузчиком они
+    остаются в памяти процесса. Возвращает число шаблонов."""
+    compiled = 0
+    for engine in engines.all():
+        if not hasattr(engine, 'engine'):
+            continue
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except Exception:
+                logger.debug('Шаблон %s не скомпилирован', name)
+            else:
+                compiled += 1
+    return compiled
+
+
+def url_patterns(resolver, namespace=''):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            inner = namespace
+            if pattern.namespace:
+                inner = f'{namespace}{pattern.namespace}:'
+            yield from url_patterns(pattern, inner)
+        elif pattern.name:
+            yield namespace + pattern.name, pattern
+
+
+def warm_urls():
+    """Собирает таблицы маршрутов и проверяет reverse и resolve
+    для каждого маршрута posts. Возвращает число маршрутов."""
+    resolved = 0
+    for name, pattern in url_patterns(get_resolver()):
+        if not name.startswith('posts:'):
+            continue
+        kwargs = {
+            key: 1 if isinstance(converter, IntConverter) else 'warmup'
+            for key, converter in pattern.pattern.converters.items()
+        }
+        resolve(reverse(name, kwargs=kwargs))
+        resolved += 1
+    return resolved
+
+
+def warm_imports():
+    """Импортирует модули, которые иначе загружаются при первой
+    картинке: плагины Pillow и ленивые объекты sorl-thumbnail.
+    Возвращает классы созданных объектов sorl."""
+    from PIL import Image
+    from sorl.thumbnail import default
+
+    Image.init()
+    return [
+        lazy.__class__.__name__
+        for lazy in (default.backend, default.engine, default.kvstore,
+                     default.storage)
+    ]
+
+
+def warmup_host():
+    for host in settings.ALLOWED_HOSTS:
+        if '*' not in host and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def get(application, path, host=None):
+    """GET через WSGI-приложение целиком, с middleware.
+    Возвращает код ответа."""
+    path, _, query = path.partition('?')
+    host = host or warmup_host()
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    status = []
+    response = application(
+        environ, lambda code, headers, exc_info=None: status.append(code)
+    )
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+def warm_pages(application):
+    """Запрашивает WARMUP_URLS: заполняет кеш страниц и открывает
+    соединения с БД. Возвращает число успешных ответов."""
+    ok = 0
+    for name in WARMUP_URLS:
+        if get(application, reverse(name)) < 400:
+            ok += 1
+    return ok
+
+
+def warm_up(application=None, pages=True):
+    """Прогревает процесс до первого запроса. Возвращает список
+    (шаг, результат, секунды). Ошибки шагов пишутся в лог и не
+    мешают запуску воркера."""
+    steps = [
+        ('templates', warm_templates),
+        ('urls', warm_urls),
+        ('imports', warm_imports),
+    ]
+    if pages:
+        application = application or WSGIHandler()
+        steps.append(('pages', lambda: warm_pages(application)))
+    results = []
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            result = step()
+        except Exception:
+            logger.exception('Ошибка прогрева: %s', name)
+            result = None
+        results.append((name, result, time.perf_counter() - start))
+    # Воркеры gunicorn --preload не должны унаследовать соединения.
+    connections.close_all()
+    return results
@@ -0,0 +1,189 @@
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .bulk import BULK_CHUNK_SIZE
+from .caching import (cache_page_by_generation, group_scopes, index_scopes,
+                      post_detail_scopes, profile_scopes)
+from .models import Comment, Group, Post, TimelineEntry, User
+from .utils import (CURSOR_PARAM, NUMBER_OF_COMMENTS, NUMBER_OF_POSTS,
+                    CursorPaginator)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+API_MAX_LIMIT = 100
+STREAM_FORMAT = 'ndjson'
+POST_FIELDS = (
+    'pk', 'text', 'pub_date', 'updated', 'image', 'author__username',
+    'author__first_name', 'author__last_name', 'group__slug',
+    'group__title',
+)
+COMMENT_FIELDS = (
+    'pk', 'text', 'created', 'author__username', 'author__first_name',
+    'author__last_name',
+)
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(
+        data, ensure_ascii=False, separators=(',', ':')
+    ).encode()
+
+
+def json_response(data, status=HTTPStatus.OK):
+    return HttpResponse(
+        dumps(data), status=status, content_type='application/json'
+    )
+
+
+def not_found():
+    return json_response({'detail': 'Не найдено'}, HTTPStatus.NOT_FOUND)
+
+
+def serialize_author(row, prefix=''):
+    full_name = ' '.join(filter(None, (
+        row[f'{prefix}author__first_name'], row[f'{prefix}author__last_name']
+    )))
+    return {
+        'username': row[f'{prefix}author__username'],
+        'full_name': full_name,
+    }
+
+
+def serialize_post(row, prefix=''):
+    """Словарь записи из строки values() с полями POST_FIELDS,
+    при необходимости с префиксом связи (post__)."""
+    group = None
+    if row[f'{prefix}group__slug']:
+        group = {
+            'slug': row[f'{prefix}group__slug'],
+            'title': row[f'{prefix}group__title'],
+        }
+    image = row[f'{prefix}image']
+    return {
+        'id': row[f'{prefix}pk'],
+        'text': row[f'{prefix}text'],
+        'pub_date': row[f'{prefix}pub_date'].isoformat(),
+        'updated': row[f'{prefix}updated'].isoformat(),
+        'author': serialize_author(row, prefix),
+        'group': group,
+        'image': settings.MEDIA_URL + image if image else None,
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row['pk'],
+        'text': row['text'],
+        'created': row['created'].isoformat(),
+        'author': serialize_author(row),
+    }
+
+
+def get_limit(request, default=NUMBER_OF_POSTS):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        return default
+    return max(1, min(limit, API_MAX_LIMIT))
+
+
+def feed_response(request, rows, prefix=''):
+    """Страница ленты по курсору или, с ?format=ndjson, вся лента
+    потоком по одной записи в строке."""
+    if request.GET.get('format') == STREAM_FORMAT:
+        stream = (
+            dumps(serialize_post(row, prefix)) + b'\n'
+            for row in rows.order_by('-pub_date', '-pk').iterator(
+                chunk_size=BULK_CHUNK_SIZE
+            )
+        )
+        return StreamingHttpResponse(
+            stream, content_type='application/x-ndjson'
+        )
+    page = CursorPaginator(rows, get_limit(request)).get_page(
+        request.GET.get(CURSOR_PARAM)
+    )
+    return json_response({
+        'results': [serialize_post(row, prefix) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@cache_page_by_generation(index_scopes, last_modified=True)
+def index(request):
+    return feed_response(request, Post.objects.values(*POST_FIELDS))
+
+
+@cache_page_by_generation(group_scopes, last_modified=True)
+def group_posts(request, slug):
+    group_id = Group.objects.filter(
+        slug=slug
+    ).values_list('pk', flat=True).first()
+    if group_id is None:
+        return not_found()
+    return feed_response(
+        request, Post.objects.filter(group_id=group_id).values(*POST_FIELDS)
+    )
+
+
+@cache_page_by_generation(profile_scopes, last_modified=True)
+def profile(request, username):
+    author_id = User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    if author_id is None:
+        return not_found()
+    return feed_response(
+        request, Post.objects.filter(author_id=author_id).values(*POST_FIELDS)
+    )
+
+
+@cache_page_by_generation(post_detail_scopes, last_modified=True)
+def post_detail(request, post_id):
+    row = Post.objects.filter(pk=post_id).values(*POST_FIELDS).first()
+    if row is None:
+        return not_found()
+    post = serialize_post(row)
+    comments = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS),
+        NUMBER_OF_COMMENTS, 'created',
+    ).get_page(None)
+    post['comments'] = [serialize_comment(comment) for comment in comments]
+    post['comments_next'] = comments.next_cursor
+    return json_response(post)
+
+
+@cache_page_by_generation(post_detail_scopes)
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return not_found()
+    page = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS),
+        get_limit(request, NUMBER_OF_COMMENTS), 'created',
+    ).get_page(request.GET.get(CURSOR_PARAM))
+    return json_response({
+        'results': [serialize_comment(comment) for comment in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return json_response(
+            {'detail': 'Требуется авторизация'}, HTTPStatus.UNAUTHORIZED
+        )
+    rows = TimelineEntry.objects.filter(user=request.user).values(
+        'pk', 'pub_date', *(f'post__{field}' for field in POST_FIELDS)
+    )
+    return feed_response(request, rows, prefix='post__')
@@ -0,0 +1,264 @@
+import csv
+import json
+
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching
+from .bulk import BULK_CHUNK_SIZE, chunked, explicit_dates
+from .models import Comment, Follow, Group, Post, User
+
+
+JSONL = 'jsonl'
+CSV = 'csv'
+FORMATS = (JSONL, CSV)
+POST = 'post'
+COMMENT = 'comment'
+FOLLOW = 'follow'
+KINDS = (POST, COMMENT, FOLLOW)
+
+# Поля архива и соответствующие им выражения для values().
+EXPORT_FIELDS = {
+    POST: {
+        'id': 'pk',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'image': 'image',
+    },
+    COMMENT: {
+        'id': 'pk',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    },
+    FOLLOW: {
+        'user': 'user__username',
+        'author': 'author__username',
+    },
+}
+EXPORT_QUERYSETS = {
+    POST: lambda: Post.objects.order_by('pk'),
+    COMMENT: lambda: Comment.objects.order_by('pk'),
+    FOLLOW: lambda: Follow.objects.order_by('pk'),
+}
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def guess_format(path):
+    return CSV if path.lower().endswith('.csv') else JSONL
+
+
+def read_rows(stream, fmt):
+    """Построчно читает архив, не загружая его в память целиком."""
+    if fmt == CSV:
+        yield from csv.DictReader(stream)
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise ArchiveError(f'Строка {number}: {error}')
+
+
+def export_rows(kind, chunk_size=BULK_CHUNK_SIZE):
+    fields = EXPORT_FIELDS[kind]
+    rows = EXPORT_QUERYSETS[kind]().values_list(*fields.values())
+    for values in rows.iterator(chunk_size=chunk_size):
+        row = dict(zip(fields, values))
+        for name, value in row.items():
+            if hasattr(value, 'isoformat'):
+                row[name] = value.isoformat()
+        yield row
+
+
+def write_rows(stream, fmt, kind, rows):
+    written = 0
+    if fmt == CSV:
+        writer = csv.DictWriter(stream, fieldnames=list(EXPORT_FIELDS[kind]))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+        return written
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        written += 1
+    return written
+
+
+def parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ArchiveError(f'Неверный идентификатор: {value}')
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ArchiveError(f'Неверная дата: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+class Importer:
+    """Загружает строки архива пачками через bulk_create.
+
+    Авторы и группы ищутся по словарям username -> pk и slug -> pk,
+    которые заполняются один раз при создании импортёра. Каждая
+    пачка сохраняется в отдельной транзакции.
+    """
+
+    def __init__(self, kind, chunk_size=BULK_CHUNK_SIZE,
+                 create_missing=False):
+        self.kind = kind
+        self.chunk_size = chunk_size
+        self.create_missing = create_missing
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.imported = 0
+        self.skipped = 0
+        self.scopes = set()
+        self.explicit_ids = False
+
+    def run(self, rows):
+        build = getattr(self, f'build_{self.kind}s')
+        model = {POST: Post, COMMENT: Comment, FOLLOW: Follow}[self.kind]
+        date_fields = [
+            field for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now_add', False)
+        ]
+        with explicit_dates(*date_fields):
+            for chunk in chunked(rows, self.chunk_size):
+                try:
+                    with transaction.atomic():
+                        objs = build(chunk)
+                        model.objects.bulk_create(objs)
+                except IntegrityError as error:
+                    raise ArchiveError(
+                        f'Пачка после {self.imported} строк не загружена '
+                        f'(повторный идентификатор?): {error}'
+                    )
+                self.imported += len(objs)
+                self.skipped += len(chunk) - len(objs)
+        if self.explicit_ids:
+            self.reset_sequence(model)
+        caching.bump(*self.scopes)
+        return self.imported
+
+    def reset_sequence(self, model):
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def resolve_users(self, usernames):
+        missing = {
+            name for name in usernames if name and name not in self.users
+        }
+        if missing and self.create_missing:
+            User.objects.bulk_create(
+                User(username=name, password='!') for name in missing
+            )
+            self.users.update(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'pk'))
+
+    def resolve_groups(self, slugs):
+        missing = {slug for slug in slugs if slug not in self.groups}
+        if missing and self.create_missing:
+            Group.objects.bulk_create(
+                Group(title=slug, slug=slug, description='')
+                for slug in missing
+            )
+            self.groups.update(Group.objects.filter(
+                slug__in=missing
+            ).values_list('slug', 'pk'))
+
+    def row_id(self, row):
+        if not row.get('id'):
+            return None
+        self.explicit_ids = True
+        return parse_id(row['id'])
+
+    def build_posts(self, rows):
+        self.resolve_users(row.get('author') for row in rows)
+        self.resolve_groups(row['group'] for row in rows if row.get('group'))
+        posts = []
+        for row in rows:
+            author_id = self.users.get(row.get('author'))
+            group_id = self.groups.get(row.get('group'))
+            if author_id is None or (row.get('group') and group_id is None):
+                continue
+            posts.append(Post(
+                pk=self.row_id(row),
+                author_id=author_id,
+                group_id=group_id,
+                text=row.get('text') or '',
+                pub_date=parse_date(row.get('pub_date')),
+                image=row.get('image') or '',
+            ))
+            self.scopes.add(caching.author_scope(author_id))
+            if group_id:
+                self.scopes.add(caching.group_scope(group_id))
+        if posts:
+            self.scopes.add(caching.POSTS_SCOPE)
+        return posts
+
+    def build_comments(self, rows):
+        self.resolve_users(row.get('author') for row in rows)
+        post_ids = set(Post.objects.filter(
+            pk__in={parse_id(row['post']) for row in rows if row.get('post')}
+        ).values_list('pk', flat=True))
+        comments = []
+        for row in rows:
+            author_id = self.users.get(row.get('author'))
+            post_id = parse_id(row['post']) if row.get('post') else None
+            if author_id is None or post_id not in post_ids:
+                continue
+            comments.append(Comment(
+                pk=self.row_id(row),
+                post_id=post_id,
+                author_id=author_id,
+                text=row.get('text') or '',
+                created=parse_date(row.get('created')),
+            ))
+            self.scopes.add(caching.post_scope(post_id))
+        return comments
+
+    def build_follows(self, rows):
+        self.resolve_users(
+            name for row in rows for name in (row.get('user'),
+                                              row.get('author'))
+        )
+        pairs = set()
+        for row in rows:
+            user_id = self.users.get(row.get('user'))
+            author_id = self.users.get(row.get('author'))
+            if user_id is None or author_id is None or user_id == author_id:
+                continue
+            pairs.add((user_id, author_id))
+        # Уже существующие подписки отбрасываются заранее, чтобы
+        # imported учитывал только действительно добавленные строки.
+        existing = Follow.objects.filter(
+            user_id__in={user_id for user_id, _ in pairs},
+            author_id__in={author_id for _, author_id in pairs},
+        ).values_list('user_id', 'author_id')
+        pairs.difference_update(existing)
+        return [
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in sorted(pairs)
+        ]
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management import call_command
+
+
+BULK_CHUNK_SIZE = 1000
+
+
+def chunked(iterable, size=BULK_CHUNK_SIZE):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def bulk_insert(model, objs, chunk_size=BULK_CHUNK_SIZE, **kwargs):
+    """bulk_create по частям: в памяти не больше chunk_size объектов,
+    а размер пакета INSERT Django подбирает под ограничения БД."""
+    created = 0
+    for chunk in chunked(objs, chunk_size):
+        model.objects.bulk_create(chunk, **kwargs)
+        created += len(chunk)
+    return created
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Позволяет сохранить заданные даты в полях с auto_now_add,
+    например при импорте архива."""
+    originals = [(field, field.auto_now_add) for field in fields]
+    for field, _ in originals:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add in originals:
+            field.auto_now_add = auto_now_add
+
+
+def rebuild_derived_data(stdout=None):
+    """Пересчитывает данные, которые при bulk_create не обновляются
+    сигналами: ленты подписок, счётчики профилей, сводки групп,
+    поисковый индекс и рейтинги популярности."""
+    for command in (
+        'rebuild_timelines', 'reconcile_counters', 'rebuild_group_stats',
+        'rebuild_search_index', 'rebuild_trending',
+    ):
+        call_command(command, stdout=stdout)
@@ -0,0 +1,207 @@
+import hashlib
+import secrets
+import time
+from functools import wraps
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from core import metrics, routers
+
+from .models import Group, Post, User
+
+
+PAGE_CACHE_TIMEOUT = 60 * 60 * 6
+POSTS_SCOPE = 'posts'
+TRENDING_SCOPE = 'trending'
+# Новые комментарии не сбрасывают страницу популярных записей,
+# порядок на ней обновляется не реже этого интервала.
+TRENDING_CACHE_TIMEOUT = 60 * 5
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def generation_key(scope):
+    return f'generation:{scope}'
+
+
+def new_generation():
+    """Поколение - пара (метка, время сброса). Случайная метка не
+    совпадёт ни с одним из прежних поколений, даже если счётчик был
+    вытеснен из кеша; время сброса служит Last-Modified страниц."""
+    return secrets.randbits(64), int(time.time())
+
+
+def get_generations(scopes):
+    keys = [generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, new_generation(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def write_generations(scopes):
+    cache.set_many(
+        {generation_key(scope): new_generation() for scope in scopes}, None
+    )
+
+
+def bump(*scopes):
+    """Сбрасывает закешированные страницы всех переданных областей.
+
+    Вместо incr записывается новое случайное поколение: incr в
+    FileBasedCache не атомарен, и два одновременных сброса слились бы
+    в одно поколение вместе со страницей, собранной между ними.
+
+    Внутри транзакции поколения записываются ещё раз после COMMIT:
+    другой запрос мог до фиксации собрать страницу по старым данным
+    и сохранить её под новым поколением.
+    """
+    write_generations(scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: write_generations(scopes))
+
+
+def page_state(request, scopes):
+    """Возвращает ключ страницы и время последнего сброса её
+    областей: удаление записи или новая подписка сбрасывают область
+    так же, как и правка, и Last-Modified не отстаёт от содержимого.
+
+    Страница, прочитанная с реплики, зависит и от её снимка: в ключ
+    входит отметка синхронизации, иначе отстающая реплика сохранила
+    бы устаревшую страницу под новым поколением.
+    """
+    viewer = ''
+    if request.user.is_authenticated:
+        viewer = request.session.session_key
+    parts = [request.get_full_path(), viewer, str(routers.replica_position())]
+    modified = 0
+    for scope, (token, bumped) in zip(scopes, get_generations(scopes)):
+        parts.append(f'{scope}={token}')
+        modified = max(modified, bumped)
+    return hashlib.md5('|'.join(parts).encode()).hexdigest(), modified
+
+
+def not_modified_response(request, etag, last_modified):
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+def render_and_store(key, timeout, render, headers):
+    """Отдаёт страницу из кеша или рендерит её и сохраняет успешный
+    ответ вместе с заголовками проверки."""
+    response = cache.get(key)
+    metrics.record_cache(response is not None)
+    if response is not None:
+        return response
+    response = render()
+    if response.status_code == HTTPStatus.OK and not response.streaming:
+        for header, value in headers.items():
+            response[header] = value
+        cache.set(key, response, timeout)
+    return response
+
+
+def cache_page_by_generation(get_scopes, timeout=PAGE_CACHE_TIMEOUT,
+                             last_modified=False):
+    """Кеширует страницу, пока не изменится поколение её областей.
+
+    get_scopes(request, *args, **kwargs) возвращает список областей,
+    от содержимого которых зависит страница. Ключ кеша служит и ETag
+    страницы, поэтому повторный запрос с If-None-Match получает
+    304 без обращения к БД за записями. С last_modified страница
+    получает Last-Modified по времени последнего сброса её областей
+    и отвечает 304 на If-Modified-Since.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            digest, modified = page_state(
+                request, get_scopes(request, *args, **kwargs)
+            )
+            etag = f'W/"{digest}"'
+            headers = {'ETag': etag}
+            if not last_modified:
+                modified = None
+            else:
+                headers['Last-Modified'] = http_date(modified)
+            response = not_modified_response(request, etag, modified)
+            if response is not None:
+                return response
+            return render_and_store(
+                f'page:{digest}', timeout,
+                lambda: view(request, *args, **kwargs), headers,
+            )
+        return wrapper
+    return decorator
+
+
+def index_scopes(request):
+    return [POSTS_SCOPE]
+
+
+def group_index_scopes(request):
+    return [POSTS_SCOPE]
+
+
+def trending_scopes(request):
+    return [POSTS_SCOPE, TRENDING_SCOPE]
+
+
+def group_scopes(request, slug):
+    group_id = Group.objects.filter(
+        slug=slug
+    ).values_list('pk', flat=True).first()
+    return [group_scope(group_id)]
+
+
+def profile_scopes(request, username):
+    # Группы автора берутся из сводок групп тем же запросом:
+    # переименование группы меняет подписи записей в профиле.
+    rows = User.objects.filter(username=username).values_list(
+        'pk', 'group_stats__group_id'
+    )
+    author_id = None
+    scopes = []
+    for author_id, group_id in rows:
+        if group_id:
+            scopes.append(group_scope(group_id))
+    return [author_scope(author_id), *sorted(scopes)]
+
+
+def post_detail_scopes(request, post_id):
+    author_id, group_id = Post.objects.filter(
+        pk=post_id
+    ).values_list('author_id', 'group_id').first() or (None, None)
+    scopes = [post_scope(post_id), author_scope(author_id)]
+    if group_id:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def post_scopes(post):
+    scopes = [POSTS_SCOPE, author_scope(post.author_id), post_scope(post.pk)]
+    if post.group_id:
+        scopes.append(group_scope(post.group_id))
+    return scopes
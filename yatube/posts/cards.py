@@ -0,0 +1,46 @@
+import hashlib
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .images import get_thumbnail_url
+
+
+CARD_TEMPLATE = 'includes/post_card.html'
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def card_key(post):
+    """Ключ зависит от всего, что выводится в карточке: после
+    редактирования записи, смены имени автора или названия группы
+    старая карточка просто перестаёт запрашиваться."""
+    version = '|'.join((
+        post.updated.isoformat(),
+        post.author.get_full_name(),
+        str(post.group or ''),
+    ))
+    digest = hashlib.md5(version.encode()).hexdigest()
+    return f'post_card:{post.pk}:{digest}'
+
+
+def render_cards(posts):
+    """Возвращает пары (запись, html карточки): готовые карточки
+    страницы достаются из кеша одним get_many, остальные рендерятся
+    и сохраняются одним set_many."""
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cached = cache.get_many(keys)
+    rendered = {}
+    for post, key in zip(posts, keys):
+        if key in cached:
+            continue
+        card = render_to_string(CARD_TEMPLATE, {'post': post})
+        cached[key] = card
+        # Заглушку вместо миниатюры кешировать нельзя: она
+        # осталась бы в карточке и после генерации миниатюры.
+        if not post.image or get_thumbnail_url(post):
+            rendered[key] = card
+    if rendered:
+        cache.set_many(rendered, CARD_CACHE_TIMEOUT)
+    return [(post, mark_safe(cached[key])) for post, key in zip(posts, keys)]
@@ -1,12 +1,43 @@
 from django import forms
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
 
+from posts.images import IMAGE_MAX_BYTES, IMAGE_MAX_PIXELS
 from posts.models import Post, Comment
 
 
+class PostImageField(forms.ImageField):
+    """Проверяет размер файла и разрешение картинки по заголовку
+    до того, как Pillow прочитает файл целиком."""
+
+    def to_python(self, data):
+        if data and data.size > IMAGE_MAX_BYTES:
+            raise forms.ValidationError(
+                'Файл больше %s.' % filesizeformat(IMAGE_MAX_BYTES),
+                code='file_too_large',
+            )
+        if data and hasattr(data, 'seek'):
+            try:
+                # Image.open разбирает только заголовок, пиксели
+                # не декодируются.
+                width, height = Image.open(data).size
+            except Exception:
+                width = height = 0
+            data.seek(0)
+            if width * height > IMAGE_MAX_PIXELS:
+                raise forms.ValidationError(
+                    'Слишком большое разрешение: %(width)s×%(height)s.',
+                    code='image_too_large',
+                    params={'width': width, 'height': height},
+                )
+        return super().to_python(data)
+
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'image': PostImageField}
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,86 @@
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .bulk import bulk_insert
+from .models import Group, GroupAuthor, Post
+
+
+TOP_AUTHORS = 3
+
+
+def add_post(group_id, author_id, pub_date):
+    """Учитывает новую запись в сводке группы."""
+    Group.objects.filter(pk=group_id).update(
+        posts_count=F('posts_count') + 1,
+        last_post_date=Greatest(
+            Coalesce('last_post_date', Value(pub_date)), Value(pub_date)
+        ),
+    )
+    GroupAuthor.objects.bulk_create(
+        [GroupAuthor(group_id=group_id, author_id=author_id)],
+        ignore_conflicts=True,
+    )
+    GroupAuthor.objects.filter(group_id=group_id, author_id=author_id).update(
+        posts_count=F('posts_count') + 1
+    )
+
+
+def remove_post(group_id, author_id):
+    """Убирает запись из сводки группы. Вызывается, когда запись
+    уже удалена из группы, поэтому дата последней записи
+    пересчитывается по оставшимся."""
+    Group.objects.filter(pk=group_id).update(
+        posts_count=Greatest(F('posts_count') - 1, 0),
+        last_post_date=Subquery(
+            Post.objects.filter(group_id=group_id)
+            .order_by('-pub_date').values('pub_date')[:1]
+        ),
+    )
+    stats = GroupAuthor.objects.filter(group_id=group_id, author_id=author_id)
+    stats.filter(posts_count__lte=1).delete()
+    stats.update(posts_count=F('posts_count') - 1)
+
+
+def top_authors(group_ids, size=TOP_AUTHORS):
+    """Словарь group_id -> самые активные авторы группы одним
+    запросом по индексу (group, posts_count)."""
+    top = GroupAuthor.objects.filter(
+        group_id=OuterRef('group_id')
+    ).order_by('-posts_count', '-pk').values('pk')[:size]
+    stats = GroupAuthor.objects.filter(
+        group_id__in=group_ids, pk__in=Subquery(top)
+    ).select_related('author').order_by('group_id', '-posts_count', '-pk')
+    authors = {group_id: [] for group_id in group_ids}
+    for stat in stats:
+        authors[stat.group_id].append(stat)
+    return authors
+
+
+def rebuild():
+    """Пересчитывает сводки всех групп с нуля. Возвращает
+    число групп."""
+    group_posts = Post.objects.filter(
+        group_id=OuterRef('pk')
+    ).order_by().values('group_id')
+    updated = Group.objects.update(
+        posts_count=Coalesce(Subquery(
+            group_posts.annotate(total=Count('pk')).values('total')
+        ), 0),
+        last_post_date=Subquery(
+            group_posts.annotate(last=Max('pub_date')).values('last')
+        ),
+    )
+    GroupAuthor.objects.all().delete()
+    bulk_insert(
+        GroupAuthor,
+        (
+            GroupAuthor(group_id=group_id, author_id=author_id,
+                        posts_count=total)
+            for group_id, author_id, total in Post.objects.filter(
+                group__isnull=False
+            ).values_list('group_id', 'author_id').annotate(
+                total=Count('pk')
+            ).order_by().iterator()
+        ),
+    )
+    return updated
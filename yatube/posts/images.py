@@ -0,0 +1,132 @@
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+from sorl.thumbnail import get_thumbnail
+
+from . import caching
+from .models import Post
+
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_PENDING_TIMEOUT = 60
+IMAGE_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 50 * 1000 * 1000
+# Оригиналы больше этого размера по длинной стороне уменьшаются.
+IMAGE_MAX_SIDE = 1920
+IMAGE_QUALITY = 85
+# Сведения о съёмке, профиль и прочие данные, которые не нужны
+# для показа картинки.
+IMAGE_METADATA = ('exif', 'icc_profile', 'xmp', 'photoshop', 'comment')
+
+executor = ThreadPoolExecutor(
+    max_workers=THUMBNAIL_WORKERS,
+    thread_name_prefix='thumbnails',
+)
+
+
+def thumbnail_key(image_name):
+    digest = hashlib.md5(image_name.encode()).hexdigest()
+    return f'thumbnail:{digest}'
+
+
+def get_thumbnail_url(post):
+    """Адрес готовой миниатюры картинки записи или None,
+    если миниатюра ещё не готова."""
+    if not post.image:
+        return None
+    url = cache.get(thumbnail_key(post.image.name))
+    if url is None:
+        schedule_thumbnail(post)
+    return url
+
+
+def schedule_thumbnail(post):
+    """Ставит генерацию миниатюры в очередь пула, если она
+    ещё не поставлена."""
+    if not post.image:
+        return
+    pending_key = thumbnail_key(post.image.name) + ':pending'
+    if not cache.add(pending_key, True, THUMBNAIL_PENDING_TIMEOUT):
+        return
+    if getattr(settings, 'POST_THUMBNAILS_ASYNC', True):
+        # Поток пула читает запись своим соединением и увидит её
+        # только после фиксации транзакции.
+        transaction.on_commit(
+            lambda: executor.submit(_run_in_worker, post.pk)
+        )
+    else:
+        generate_thumbnail(post.pk)
+
+
+def needs_reencoding(image):
+    if getattr(image, 'n_frames', 1) > 1:
+        return False
+    return (
+        max(image.size) > IMAGE_MAX_SIDE
+        or any(key in image.info for key in IMAGE_METADATA)
+    )
+
+
+def reencode_image(post):
+    """Уменьшает оригинал картинки до IMAGE_MAX_SIDE и пересохраняет
+    его без метаданных. Анимированные картинки не трогает."""
+    storage = post.image.storage
+    name = post.image.name
+    with storage.open(name) as file:
+        image = Image.open(file)
+        if not needs_reencoding(image):
+            return
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.LANCZOS)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        for key in IMAGE_METADATA:
+            image.info.pop(key, None)
+        buffer = io.BytesIO()
+        image.save(
+            buffer, image_format, quality=IMAGE_QUALITY, optimize=True
+        )
+    storage.delete(name)
+    new_name = storage.save(name, ContentFile(buffer.getvalue()))
+    if new_name != name:
+        Post.objects.filter(pk=post.pk, image=name).update(image=new_name)
+        post.image.name = new_name
+
+
+def generate_thumbnail(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    pending_key = thumbnail_key(post.image.name) + ':pending'
+    try:
+        # Миниатюра строится уже по уменьшенному оригиналу.
+        reencode_image(post)
+        thumbnail = get_thumbnail(
+            post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS
+        )
+        cache.set(thumbnail_key(post.image.name), thumbnail.url, None)
+    finally:
+        cache.delete(pending_key)
+    # Страницы с заглушкой вместо миниатюры больше не актуальны.
+    caching.bump(*caching.post_scopes(post))
+
+
+def _run_in_worker(post_id):
+    try:
+        generate_thumbnail(post_id)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру записи %s', post_id)
+    finally:
+        connections.close_all()
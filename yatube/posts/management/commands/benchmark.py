@@ -0,0 +1,307 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import (DatabaseError, connection, reset_queries,
+                       transaction)
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import mixer
+
+from posts.bulk import bulk_insert, explicit_dates, rebuild_derived_data
+from posts.models import Comment, Follow, Group, Post, User
+
+
+BENCHMARK_USER_PREFIX = 'bench_user_'
+VIEWS = (
+    'index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+    'add_comment', 'mixed',
+)
+# Смешанная нагрузка: чтения вперемешку с записью комментариев.
+MIXED_VIEWS = ('index', 'post_detail', 'follow_index', 'add_comment')
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу тестовыми данными и замеряет задержку '
+            'и число запросов к БД основных страниц. Запускайте только '
+            'на отдельной базе для бенчмарков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument(
+            '--no-seed', action='store_true',
+            help='Не заполнять базу, замерить на имеющихся данных.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Количество запросов к каждой странице.',
+        )
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кеш страниц перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Число потоков, одновременно выполняющих запросы.',
+        )
+        parser.add_argument(
+            '--views', default=','.join(VIEWS),
+            help='Замеряемые страницы через запятую.',
+        )
+        parser.add_argument('--output', help='Сохранить результаты в JSON.')
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого запуска для сравнения результатов.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=1.2,
+            help='Допустимое отношение p99 к прошлому запуску.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        views = [view for view in options['views'].split(',') if view]
+        unknown = set(views) - set(VIEWS)
+        if unknown:
+            raise CommandError(
+                'Неизвестные страницы: ' + ', '.join(sorted(unknown))
+            )
+        if not options['no_seed']:
+            self.seed(options)
+        if not Post.objects.exists():
+            raise CommandError('В базе нет записей для замеров.')
+        results = {
+            'started': timezone.now().isoformat(),
+            'dataset': {
+                'users': User.objects.count(),
+                'posts': Post.objects.count(),
+                'follows': Follow.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+            'views': self.measure(
+                options['requests'], options['warm'],
+                options['concurrency'], views,
+            ),
+        }
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        if options['compare']:
+            with open(options['compare']) as previous:
+                self.compare(json.load(previous), results,
+                             options['threshold'])
+
+    def seed(self, options):
+        faker = Faker('ru_RU')
+        faker.seed_instance(options['seed'])
+        start = time.perf_counter()
+        offset = User.objects.filter(
+            username__startswith=BENCHMARK_USER_PREFIX
+        ).count()
+        with transaction.atomic():
+            bulk_insert(
+                User,
+                (
+                    User(
+                        username=f'{BENCHMARK_USER_PREFIX}{offset + number}',
+                        first_name=faker.first_name(),
+                        last_name=faker.last_name(),
+                        password='!',
+                    )
+                    for number in range(options['users'])
+                ),
+            )
+            mixer.cycle(options['groups']).blend(Group)
+            user_ids = list(User.objects.values_list('pk', flat=True))
+            group_ids = list(Group.objects.values_list('pk', flat=True))
+            group_ids.append(None)
+            now = timezone.now()
+            with explicit_dates(Post._meta.get_field('pub_date')):
+                bulk_insert(
+                    Post,
+                    (
+                        Post(
+                            author_id=self.random.choice(user_ids),
+                            group_id=self.random.choice(group_ids),
+                            text=faker.text(max_nb_chars=300),
+                            pub_date=now - timedelta(minutes=number),
+                        )
+                        for number in range(options['posts'])
+                    ),
+                )
+            follows = {
+                tuple(self.random.sample(user_ids, 2))
+                for _ in range(options['follows'])
+            }
+            bulk_insert(
+                Follow,
+                (Follow(user_id=user, author_id=author)
+                 for user, author in follows),
+                ignore_conflicts=True,
+            )
+            post_ids = list(Post.objects.values_list('pk', flat=True))
+            bulk_insert(
+                Comment,
+                (
+                    Comment(
+                        post_id=self.random.choice(post_ids),
+                        author_id=self.random.choice(user_ids),
+                        text=faker.sentence(),
+                    )
+                    for _ in range(options['comments'])
+                ),
+            )
+            rebuild_derived_data(stdout=self.stdout)
+        self.stdout.write(
+            f'Данные созданы за {time.perf_counter() - start:.1f} с'
+        )
+
+    def targets(self, view):
+        """Адрес, метод и пользователь для очередного запроса к view."""
+        if view == 'mixed':
+            view = self.random.choice(MIXED_VIEWS)
+        if view == 'index':
+            page = self.random.randint(1, 5)
+            return f'{reverse("posts:index")}?page={page}', 'get', None
+        if view == 'group_posts':
+            slug = self.random.choice(self.group_slugs)
+            return reverse('posts:group_list', args=[slug]), 'get', None
+        if view == 'profile':
+            username = self.random.choice(self.usernames)
+            return reverse('posts:profile', args=[username]), 'get', None
+        if view == 'post_detail':
+            post_id = self.random.choice(self.post_ids)
+            return reverse('posts:post_detail', args=[post_id]), 'get', None
+        if view == 'follow_index':
+            user = self.random.choice(self.followers)
+            return reverse('posts:follow_index'), 'get', user
+        post_id = self.random.choice(self.post_ids)
+        user = self.random.choice(self.followers)
+        return reverse('posts:add_comment', args=[post_id]), 'post', user
+
+    def measure(self, requests, warm, concurrency=1, views=VIEWS):
+        self.group_slugs = list(Group.objects.values_list('slug', flat=True))
+        self.usernames = list(
+            User.objects.filter(posts__isnull=False).values_list(
+                'username', flat=True
+            ).distinct()[:1000]
+        )
+        self.post_ids = list(Post.objects.values_list('pk', flat=True)[:1000])
+        self.followers = list(User.objects.filter(
+            pk__in=Follow.objects.values('user')[:1000]
+        )) or list(User.objects.all()[:1])
+        self.local = threading.local()
+        self.warm = warm
+        self.sessions = {}
+        results = {}
+        for view in views:
+            if view == 'group_posts' and not self.group_slugs:
+                continue
+            targets = [self.targets(view) for _ in range(requests)]
+            self.login({user for _, _, user in targets})
+            start = time.perf_counter()
+            if concurrency > 1:
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    samples = list(pool.map(self.request, targets))
+            else:
+                samples = [self.request(target) for target in targets]
+            elapsed = time.perf_counter() - start
+            latencies = [latency for latency, _, _ in samples]
+            queries = [count for _, count, _ in samples]
+            results[view] = {
+                'requests': requests,
+                'concurrency': concurrency,
+                'rps': round(requests / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+                'mean_queries': round(sum(queries) / len(queries), 2),
+                'max_queries': max(queries),
+                'errors': sum(failed for _, _, failed in samples),
+            }
+        return results
+
+    def login(self, users):
+        """Создаёт сессии заранее, в основном потоке: вход не должен
+        попадать в замеры и конкурировать за запись в БД."""
+        for user in users:
+            if user is not None and user not in self.sessions:
+                client = Client()
+                client.force_login(user)
+                self.sessions[user] = client.cookies
+
+    def request(self, target):
+        """Выполняет один запрос, возвращает (задержку, число запросов
+        к БД, была ли ошибка БД). Клиенты у каждого потока свои."""
+        url, method, user = target
+        clients = getattr(self.local, 'clients', None)
+        if clients is None:
+            clients = self.local.clients = {}
+        if user not in clients:
+            clients[user] = Client()
+            clients[user].cookies.update(self.sessions.get(user, {}))
+        if not self.warm:
+            cache.clear()
+        data = {'text': 'benchmark'} if method == 'post' else None
+        reset_queries()
+        failed = False
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            try:
+                getattr(clients[user], method)(url, data)
+            except DatabaseError:
+                failed = True
+            latency = time.perf_counter() - start
+        return latency, len(captured), failed
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"view":<14}{"запр./с":>10}{"p50, мс":>10}{"p99, мс":>10}'
+            f'{"запросы":>10}{"макс.":>8}{"ошибки":>8}'
+        )
+        for view, result in results['views'].items():
+            self.stdout.write(
+                f'{view:<14}{result["rps"]:>10}'
+                f'{result["p50_ms"]:>10}{result["p99_ms"]:>10}'
+                f'{result["mean_queries"]:>10}{result["max_queries"]:>8}'
+                f'{result.get("errors", 0):>8}'
+            )
+
+    def compare(self, previous, current, threshold):
+        regressions = []
+        for view, result in current['views'].items():
+            before = previous['views'].get(view)
+            if before is None:
+                continue
+            ratio = result['p99_ms'] / before['p99_ms']
+            self.stdout.write(
+                f'{view:<14}p99 {before["p99_ms"]} -> {result["p99_ms"]} мс '
+                f'(x{ratio:.2f}), запросы {before["max_queries"]} -> '
+                f'{result["max_queries"]}'
+            )
+            if (ratio > threshold
+                    or result['max_queries'] > before['max_queries']):
+                regressions.append(view)
+        if regressions:
+            raise CommandError(
+                'Регрессия производительности: ' + ', '.join(regressions)
+            )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import caching, trending
+
+
+class Command(BaseCommand):
+    help = ('Уменьшает рейтинги популярности записей с течением времени. '
+            'Запускается по расписанию раз в --interval секунд.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=trending.TRENDING_DECAY_INTERVAL,
+            help='Сколько секунд прошло с прошлого запуска.',
+        )
+        parser.add_argument(
+            '--half-life',
+            type=int,
+            default=trending.TRENDING_HALF_LIFE,
+            help='За сколько секунд рейтинг уменьшается вдвое.',
+        )
+
+    def handle(self, *args, **options):
+        decayed = trending.decay(options['interval'], options['half_life'])
+        caching.bump(caching.TRENDING_SCOPE)
+        self.stdout.write(f'Обновлено рейтингов: {decayed}')
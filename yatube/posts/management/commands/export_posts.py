@@ -0,0 +1,38 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = 'Выгружает записи, комментарии или подписки в JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл архива или - для stdout.')
+        parser.add_argument(
+            '--kind', choices=archive.KINDS, default=archive.POST,
+        )
+        parser.add_argument('--format', choices=archive.FORMATS)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or archive.guess_format(path)
+        start = time.perf_counter()
+        stream = sys.stdout if path == '-' else open(
+            path, 'w', encoding='utf-8', newline=''
+        )
+        try:
+            written = archive.write_rows(
+                stream, fmt, options['kind'],
+                archive.export_rows(options['kind']),
+            )
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        elapsed = time.perf_counter() - start
+        self.stderr.write(
+            f'Выгружено: {written} за {elapsed:.1f} с '
+            f'({written / max(elapsed, 1e-6):.0f} строк/с)'
+        )
@@ -0,0 +1,59 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import archive
+from posts.bulk import BULK_CHUNK_SIZE, rebuild_derived_data
+
+
+class Command(BaseCommand):
+    help = ('Загружает записи, комментарии или подписки из JSONL или CSV '
+            'пачками через bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл архива или - для stdin.')
+        parser.add_argument(
+            '--kind', choices=archive.KINDS, default=archive.POST,
+        )
+        parser.add_argument('--format', choices=archive.FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=BULK_CHUNK_SIZE,
+            help='Строк в одной транзакции.',
+        )
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных авторов и группы.',
+        )
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='Не пересчитывать ленты, счётчики и поисковый индекс.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or archive.guess_format(path)
+        importer = archive.Importer(
+            options['kind'],
+            chunk_size=options['batch_size'],
+            create_missing=options['create_missing'],
+        )
+        start = time.perf_counter()
+        stream = sys.stdin if path == '-' else open(
+            path, encoding='utf-8', newline=''
+        )
+        try:
+            importer.run(archive.read_rows(stream, fmt))
+        except archive.ArchiveError as error:
+            raise CommandError(error)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Импортировано: {importer.imported}, пропущено: '
+            f'{importer.skipped} за {elapsed:.1f} с '
+            f'({importer.imported / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+        if not options['skip_rebuild']:
+            rebuild_derived_data(stdout=self.stdout)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import caching, group_stats
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сводки групп: число записей, дату последней '
+            'записи и активных авторов.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuilt = group_stats.rebuild()
+        caching.bump(caching.POSTS_SCOPE)
+        self.stdout.write(f'Пересчитано групп: {rebuilt}')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import caching, trending
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинги популярности записей по комментариям '
+            'и подписчикам авторов.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuilt = trending.rebuild()
+        caching.bump(caching.TRENDING_SCOPE)
+        self.stdout.write(f'Пересчитано записей: {rebuilt}')
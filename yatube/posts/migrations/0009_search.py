@@ -0,0 +1,66 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:57
+
+import re
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+import django.db.models.deletion
+
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def create_search_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(text)'
+            )
+        except OperationalError:
+            pass
+        else:
+            schema_editor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                f'SELECT id, text FROM posts_post'
+            )
+            return
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for post in Post.objects.only('pk', 'text').iterator():
+        counter = {}
+        for token in re.findall(r'\w+', post.text.lower()):
+            counter[token[:100]] = counter.get(token[:100], 0) + 1
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term, post_id=post.pk, frequency=frequency)
+            for term, frequency in counter.items()
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, verbose_name='Слово')),
+                ('frequency', models.PositiveIntegerField(verbose_name='Частота')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Запись')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'post'], name='posts_searc_term_27a9f7_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:27
+
+import math
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+HALF_LIFE = 60 * 60 * 12
+
+
+def fill_scores(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    now = timezone.now()
+
+    def aged(weight, date):
+        return weight * 0.5 ** ((now - date).total_seconds() / HALF_LIFE)
+
+    scores = {}
+    for post_id, created in Comment.objects.values_list(
+        'post_id', 'created'
+    ).iterator():
+        scores[post_id] = scores.get(post_id, 0) + aged(1, created)
+    for pk, pub_date, followers_count in Post.objects.values_list(
+        'pk', 'pub_date', 'author__profile__followers_count'
+    ).iterator():
+        weight = 1 + 0.5 * math.log2(1 + (followers_count or 0))
+        Post.objects.filter(pk=pk).update(
+            trending_score=aged(weight, pub_date) + scores.get(pk, 0)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_updated_index'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг популярности'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['trending_score'], name='posts_post_trendin_6f6a8f_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupAuthor = apps.get_model('posts', 'GroupAuthor')
+    Post = apps.get_model('posts', 'Post')
+    for group in Group.objects.annotate(
+        total=models.Count('posts'), last=models.Max('posts__pub_date')
+    ):
+        Group.objects.filter(pk=group.pk).update(
+            posts_count=group.total, last_post_date=group.last
+        )
+    GroupAuthor.objects.bulk_create(
+        (
+            GroupAuthor(group_id=group_id, author_id=author_id,
+                        posts_count=total)
+            for group_id, author_id, total in Post.objects.filter(
+                group__isnull=False
+            ).values_list('group_id', 'author_id').annotate(
+                models.Count('pk')
+            ).order_by().iterator()
+        ),
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_post_trending_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата последней записи'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество записей'),
+        ),
+        migrations.CreateModel(
+            name='GroupAuthor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество записей')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_stats', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='author_stats', to='posts.Group', verbose_name='Группа')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='groupauthor',
+            index=models.Index(fields=['group', 'posts_count'], name='posts_group_group_i_664139_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupauthor',
+            constraint=models.UniqueConstraint(fields=('group', 'author'), name='unique_group_author'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
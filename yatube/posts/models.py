@@ -11,6 +11,17 @@ class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Заголовок')
     slug = models.SlugField(unique=True, verbose_name='Категория')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество записей',
+    )
+    last_post_date = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Дата последней записи',
+    )
 
     def __str__(self):
         return self.title
@@ -25,6 +36,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -46,12 +61,24 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Рейтинг популярности'
+    )
 
     def __str__(self):
         return self.text[FIRST_FIFTEEN_CHARS_OF_TEXT]
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['pub_date']),
+            models.Index(fields=['group', 'pub_date']),
+            models.Index(fields=['author', 'pub_date']),
+            models.Index(fields=['updated']),
+            models.Index(fields=['trending_score']),
+        ]
 
 
 class Comment(models.Model):
@@ -83,6 +110,9 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', 'created']),
+        ]
 
 
 class Follow(models.Model):
@@ -96,3 +126,85 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow',
+            ),
+        ]
+
+
+class GroupAuthor(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+        verbose_name='Группа',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_stats',
+        verbose_name='Автор',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество записей',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'posts_count']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'author'],
+                name='unique_group_author',
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Запись',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['user', 'pub_date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry',
+            ),
+        ]
+
+
+class SearchTerm(models.Model):
+    term = models.CharField(max_length=100, verbose_name='Слово')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Запись',
+    )
+    frequency = models.PositiveIntegerField(verbose_name='Частота')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'post']),
+        ]
@@ -0,0 +1,150 @@
+import re
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Count, Sum
+
+from .models import Post, SearchTerm
+
+
+FTS_TABLE = 'posts_post_fts'
+TOKEN_RE = re.compile(r'\w+')
+TERM_MAX_LENGTH = SearchTerm._meta.get_field('term').max_length
+MAX_QUERY_TERMS = 10
+
+
+def tokenize(text):
+    return [
+        token[:TERM_MAX_LENGTH] for token in TOKEN_RE.findall(text.lower())
+    ]
+
+
+class Fts5Backend:
+    """Полнотекстовый индекс SQLite FTS5, rowid совпадает с pk записи."""
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [post.pk, post.text],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self._match(terms)],
+            )
+            return cursor.fetchone()[0]
+
+    def ids(self, terms, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [self._match(terms), limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def _match(self, terms):
+        return ' '.join(f'"{term}"' for term in terms)
+
+
+class TableBackend:
+    """Инвертированный индекс в таблице SearchTerm для баз без FTS5."""
+
+    def index(self, post):
+        SearchTerm.objects.filter(post=post).delete()
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term, post=post, frequency=frequency)
+            for term, frequency in Counter(tokenize(post.text)).items()
+        )
+
+    def remove(self, post_id):
+        SearchTerm.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        SearchTerm.objects.all().delete()
+
+    def count(self, terms):
+        return self._matches(terms).count()
+
+    def ids(self, terms, offset, limit):
+        return list(self._matches(terms).annotate(
+            score=Sum('frequency')
+        ).order_by('-score', '-post').values_list(
+            'post', flat=True
+        )[offset:offset + limit])
+
+    def _matches(self, terms):
+        return SearchTerm.objects.filter(term__in=terms).values(
+            'post'
+        ).annotate(matches=Count('pk')).filter(matches=len(terms))
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if (connection.vendor == 'sqlite'
+                and FTS_TABLE in connection.introspection.table_names()):
+            _backend = Fts5Backend()
+        else:
+            _backend = TableBackend()
+    return _backend
+
+
+def rebuild():
+    """Переиндексирует все записи, возвращает их количество."""
+    backend = get_backend()
+    backend.clear()
+    indexed = 0
+    for post in Post.objects.only('pk', 'text').iterator():
+        backend.index(post)
+        indexed += 1
+    return indexed
+
+
+class SearchResults:
+    """Ленивый список найденных записей в порядке релевантности,
+    пригодный для Paginator."""
+
+    def __init__(self, query):
+        self.terms = sorted(set(tokenize(query)))[:MAX_QUERY_TERMS]
+        self.backend = get_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.terms) if self.terms else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        if not self.terms or index.stop <= start:
+            return []
+        ids = self.backend.ids(self.terms, start, index.stop - start)
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,158 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users import counters
+
+from . import caching, group_stats, search, timeline, trending
+from .models import Comment, Follow, Group, GroupAuthor, Post, User
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def invalidate_previous_group(sender, instance, raw=False, **kwargs):
+    if instance.pk is None or raw:
+        return
+    group_id = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+    # Прежняя группа нужна и для сводок групп после сохранения.
+    instance._previous_group_id = group_id
+    if group_id and group_id != instance.group_id:
+        caching.bump(caching.group_scope(group_id))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    caching.bump(*caching.post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    caching.bump(caching.post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, **kwargs):
+    # Профиль подписчика тоже меняется: в нём число его подписок.
+    caching.bump(
+        caching.author_scope(instance.author_id),
+        caching.author_scope(instance.user_id),
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    caching.bump(caching.POSTS_SCOPE, caching.group_scope(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, created=False, update_fields=None,
+                      **kwargs):
+    # Вход пользователя сохраняет только last_login, которого
+    # страницы не показывают.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    scopes = [caching.author_scope(instance.pk)]
+    if not created:
+        # Имя автора выводится и в лентах, и в каталоге групп с его
+        # записями.
+        scopes.append(caching.POSTS_SCOPE)
+        scopes.extend(
+            caching.group_scope(group_id)
+            for group_id in GroupAuthor.objects.filter(
+                author=instance
+            ).values_list('group_id', flat=True)
+        )
+    caching.bump(*scopes)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.change(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change(instance.author_id, 'followers_count', 1)
+        counters.change(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.change(instance.author_id, 'followers_count', -1)
+    counters.change(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove(instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def score_post(sender, instance, raw=False, **kwargs):
+    if instance.pk is None and not raw:
+        instance.trending_score = trending.initial_score(instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        trending.count_comment(instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+def count_group_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_group_id = None
+    if not created:
+        previous_group_id = getattr(
+            instance, '_previous_group_id', instance.group_id
+        )
+        if previous_group_id == instance.group_id:
+            return
+    if previous_group_id:
+        group_stats.remove_post(previous_group_id, instance.author_id)
+    if instance.group_id:
+        group_stats.add_post(
+            instance.group_id, instance.author_id, instance.pub_date
+        )
+
+
+@receiver(post_delete, sender=Post)
+def uncount_group_post(sender, instance, **kwargs):
+    if instance.group_id:
+        group_stats.remove_post(instance.group_id, instance.author_id)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts.images import get_thumbnail_url
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail_url(post):
+    return get_thumbnail_url(post)
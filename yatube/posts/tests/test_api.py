@@ -0,0 +1,117 @@
+import json
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import NUMBER_OF_POSTS
+
+
+class PostsApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='test_author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.group = Group.objects.create(
+            title='Test group title',
+            slug='test_group',
+            description='Test group description',
+        )
+        for number in range(NUMBER_OF_POSTS + 3):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                group=cls.group,
+                text=f'Test post {number}',
+            )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Test comment'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        cache.clear()
+
+    def test_feeds_paginated_by_cursor(self):
+        """Ленты отдаются в JSON страницами по курсору."""
+        urls = {
+            reverse('posts:api_index'): self.client,
+            reverse('posts:api_group_list', args=[self.group.slug]):
+                self.client,
+            reverse('posts:api_profile', args=[self.author.username]):
+                self.client,
+            reverse('posts:api_follow_index'): self.reader_client,
+        }
+        for url, client in urls.items():
+            with self.subTest(url=url):
+                first = client.get(url).json()
+                self.assertEqual(len(first['results']), NUMBER_OF_POSTS)
+                self.assertEqual(first['results'][0], {
+                    'id': self.post.pk,
+                    'text': self.post.text,
+                    'pub_date': self.post.pub_date.isoformat(),
+                    'updated': self.post.updated.isoformat(),
+                    'author': {
+                        'username': 'test_author',
+                        'full_name': 'Лев Толстой',
+                    },
+                    'group': {
+                        'slug': 'test_group',
+                        'title': 'Test group title',
+                    },
+                    'image': None,
+                })
+                self.assertIsNone(first['previous'])
+                second = client.get(url, {'cursor': first['next']}).json()
+                self.assertEqual(len(second['results']), 3)
+                self.assertIsNone(second['next'])
+
+    def test_index_queries(self):
+        """Лента API читается одним запросом к записям без
+        подсчёта их количества."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:api_index'))
+
+    def test_post_detail(self):
+        """Запись отдаётся вместе с комментариями."""
+        response = self.client.get(
+            reverse('posts:api_post_detail', args=[self.post.pk])
+        )
+        data = response.json()
+        self.assertEqual(data['id'], self.post.pk)
+        self.assertEqual(data['comments'][0]['text'], 'Test comment')
+        self.assertEqual(
+            data['comments'][0]['author']['username'], 'test_reader'
+        )
+
+    def test_not_found_and_unauthorized(self):
+        """Несуществующие объекты дают 404, лента подписок без
+        авторизации - 401."""
+        urls = {
+            reverse('posts:api_group_list', args=['unknown']):
+                HTTPStatus.NOT_FOUND,
+            reverse('posts:api_profile', args=['unknown']):
+                HTTPStatus.NOT_FOUND,
+            reverse('posts:api_post_detail', args=[0]):
+                HTTPStatus.NOT_FOUND,
+            reverse('posts:api_follow_index'): HTTPStatus.UNAUTHORIZED,
+        }
+        for url, status in urls.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, status)
+
+    def test_stream(self):
+        """С format=ndjson лента отдаётся потоком целиком."""
+        response = self.client.get(
+            reverse('posts:api_index'), {'format': 'ndjson'}
+        )
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), NUMBER_OF_POSTS + 3)
+        self.assertEqual(json.loads(lines[0])['id'], self.post.pk)
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from users.models import Profile
+
+
+class ArchiveCommandsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.group = Group.objects.create(
+            title='Test group title',
+            slug='test_group',
+            description='Test group description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Test post text',
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Test comment'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def call(self, command, *args, **options):
+        call_command(
+            command, *args, stdout=StringIO(), stderr=StringIO(), **options
+        )
+
+    def test_round_trip(self):
+        """Выгруженные записи, комментарии и подписки загружаются
+        обратно в пустую базу без изменений."""
+        for extension in ('jsonl', 'csv'):
+            with self.subTest(format=extension):
+                for kind in ('post', 'comment', 'follow'):
+                    self.call(
+                        'export_posts', self.path(f'{kind}.{extension}'),
+                        kind=kind,
+                    )
+                pub_date = self.post.pub_date
+                Post.objects.all().delete()
+                Follow.objects.all().delete()
+                for kind in ('post', 'comment', 'follow'):
+                    self.call(
+                        'import_posts', self.path(f'{kind}.{extension}'),
+                        kind=kind,
+                    )
+                post = Post.objects.get()
+                self.assertEqual(
+                    (post.pk, post.author, post.group, post.text,
+                     post.pub_date),
+                    (self.post.pk, self.author, self.group, self.post.text,
+                     pub_date),
+                )
+                self.assertEqual(post.comments.get().author, self.reader)
+                self.assertTrue(Follow.objects.filter(
+                    user=self.reader, author=self.author
+                ).exists())
+                self.assertTrue(TimelineEntry.objects.filter(
+                    user=self.reader, post=post
+                ).exists())
+                self.assertEqual(
+                    Profile.objects.get(user=self.author).posts_count, 1
+                )
+
+    def test_unknown_author(self):
+        """Записи неизвестных авторов пропускаются, а с
+        --create-missing авторы и группы создаются."""
+        path = self.path('posts.jsonl')
+        with open(path, 'w') as archive:
+            archive.write(
+                '{"author": "new_author", "group": "new_group", '
+                '"text": "Archive post", "pub_date": "2020-01-01T10:00:00"}\n'
+            )
+        self.call('import_posts', path)
+        self.assertFalse(Post.objects.filter(text='Archive post').exists())
+        self.call('import_posts', path, create_missing=True)
+        post = Post.objects.get(text='Archive post')
+        self.assertEqual(post.author.username, 'new_author')
+        self.assertEqual(post.group.slug, 'new_group')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertTrue(Profile.objects.filter(user=post.author).exists())
+
+    def test_import_errors(self):
+        """Повторные и неверные идентификаторы дают CommandError,
+        а существующие подписки не считаются загруженными."""
+        path = self.path('post.jsonl')
+        self.call('export_posts', path, kind='post')
+        with self.assertRaisesMessage(CommandError, 'не загружена'):
+            self.call('import_posts', path)
+        self.assertEqual(Post.objects.count(), 1)
+        with open(path, 'w') as archive:
+            archive.write('{"id": "abc", "author": "test_author"}\n')
+        with self.assertRaisesMessage(CommandError, 'abc'):
+            self.call('import_posts', path)
+        path = self.path('follow.jsonl')
+        self.call('export_posts', path, kind='follow')
+        stdout = StringIO()
+        call_command(
+            'import_posts', path, kind='follow', skip_rebuild=True,
+            stdout=stdout,
+        )
+        self.assertIn('Импортировано: 0, пропущено: 1', stdout.getvalue())
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, tag
+
+from posts.management.commands.benchmark import VIEWS
+from posts.models import Post, TimelineEntry
+
+
+# Только эти тесты: python manage.py test --tag benchmark,
+# без них: python manage.py test --exclude-tag benchmark.
+@tag('benchmark')
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        self.output = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+        self.output.close()
+
+    def tearDown(self):
+        os.remove(self.output.name)
+
+    def test_benchmark_seeds_and_measures(self):
+        """Команда benchmark заполняет базу и сохраняет замеры
+        всех страниц в JSON."""
+        call_command(
+            'benchmark', users=10, groups=2, posts=30, follows=15,
+            comments=20, requests=3, output=self.output.name,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertTrue(TimelineEntry.objects.exists())
+        with open(self.output.name) as output:
+            results = json.load(output)
+        self.assertEqual(set(results['views']), set(VIEWS))
+        for view, result in results['views'].items():
+            with self.subTest(view=view):
+                self.assertEqual(result['requests'], 3)
+                self.assertGreater(result['max_queries'], 0)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_benchmark_detects_regression(self):
+        """Сравнение с прошлым запуском сообщает о росте
+        числа запросов."""
+        call_command(
+            'benchmark', users=5, groups=1, posts=10, follows=5,
+            comments=5, requests=2, output=self.output.name,
+            stdout=StringIO(),
+        )
+        with open(self.output.name) as output:
+            results = json.load(output)
+        for result in results['views'].values():
+            result['max_queries'] = 0
+        with open(self.output.name, 'w') as output:
+            json.dump(results, output)
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark', no_seed=True, requests=2,
+                compare=self.output.name, stdout=StringIO(),
+            )
+
+
+@tag('benchmark')
+class ConcurrentBenchmarkTests(TransactionTestCase):
+    def test_concurrent_requests(self):
+        """С --concurrency запросы выполняются в нескольких потоках,
+        а в результатах есть пропускная способность."""
+        output = StringIO()
+        call_command(
+            'benchmark', users=5, groups=1, posts=20, follows=5,
+            comments=5, requests=4, concurrency=2, stdout=output,
+            views='index,profile,post_detail,follow_index',
+        )
+        self.assertIn('запр./с', output.getvalue())
+        self.assertNotIn('Traceback', output.getvalue())
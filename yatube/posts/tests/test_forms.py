@@ -1,15 +1,28 @@
+import io
 import shutil
 import tempfile
+from unittest import mock
 
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
 
+from posts.images import IMAGE_MAX_SIDE
 from posts.models import Group, Post, Comment, User
 
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 PROFILE_URL = 'posts:profile'
 POST_CREATE_URL = 'posts:post_create'
@@ -99,6 +112,99 @@ class PostFormTest(TestCase):
             self.user.username
         )
 
+    @override_settings(POST_THUMBNAILS_ASYNC=False)
+    def test_thumbnail_generated_on_create(self):
+        """Миниатюра картинки создаётся при сохранении записи."""
+        cache.clear()
+        uploaded = SimpleUploadedFile(
+            name='thumbnail.gif',
+            content=SMALL_GIF,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse(POST_CREATE_URL),
+            data={'text': self.test_text, 'image': uploaded},
+        )
+        post = Post.objects.get(author=self.user)
+        response = self.authorized_client.get(
+            reverse(POST_DETAIL_URL, kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, '<img class="card-img my-2" src=')
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+    def test_placeholder_until_thumbnail_ready(self):
+        """Пока миниатюра не готова, вместо неё выводится заглушка."""
+        cache.clear()
+        uploaded = SimpleUploadedFile(
+            name='placeholder.gif',
+            content=SMALL_GIF,
+            content_type='image/gif'
+        )
+        with mock.patch('posts.images.executor.submit') as submit, \
+                mock.patch(
+                    'posts.images.transaction.on_commit',
+                    side_effect=lambda callback: callback(),
+        ):
+            self.authorized_client.post(
+                reverse(POST_CREATE_URL),
+                data={'text': self.test_text, 'image': uploaded},
+            )
+            post = Post.objects.get(author=self.user)
+            response = self.authorized_client.get(
+                reverse(POST_DETAIL_URL, kwargs={'post_id': post.pk})
+            )
+        submit.assert_called_once()
+        self.assertContains(response, 'Изображение обрабатывается')
+        self.assertNotContains(response, '<img class="card-img')
+
+    def post_gif(self):
+        uploaded = SimpleUploadedFile(
+            name='big.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+        return self.authorized_client.post(
+            reverse(POST_CREATE_URL),
+            data={'text': self.test_text, 'image': uploaded},
+        )
+
+    @mock.patch('posts.uploads.IMAGE_MAX_BYTES', 10)
+    @mock.patch('posts.forms.IMAGE_MAX_BYTES', 10)
+    def test_large_file_rejected(self):
+        """Файл больше лимита отклоняется формой."""
+        posts_count = Post.objects.count()
+        self.assertContains(self.post_gif(), 'Файл больше')
+        self.assertEqual(Post.objects.count(), posts_count)
+
+    @mock.patch('posts.forms.IMAGE_MAX_PIXELS', 1)
+    def test_large_resolution_rejected(self):
+        """Картинка с разрешением больше лимита отклоняется формой."""
+        posts_count = Post.objects.count()
+        self.assertContains(self.post_gif(), 'Слишком большое разрешение')
+        self.assertEqual(Post.objects.count(), posts_count)
+
+    @override_settings(POST_THUMBNAILS_ASYNC=False)
+    def test_large_image_reencoded(self):
+        """Большой оригинал уменьшается и сохраняется без метаданных."""
+        cache.clear()
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = io.BytesIO()
+        Image.new('RGB', (IMAGE_MAX_SIDE * 2, 100)).save(
+            buffer, 'JPEG', exif=exif
+        )
+        uploaded = SimpleUploadedFile(
+            name='large.jpg',
+            content=buffer.getvalue(),
+            content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse(POST_CREATE_URL),
+            data={'text': self.test_text, 'image': uploaded},
+        )
+        post = Post.objects.get(author=self.user)
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (IMAGE_MAX_SIDE, 50))
+            self.assertNotIn('exif', image.info)
+
     def test_author_can_edit_post(self):
         """Автор поста может редактировать текст и менять группу."""
         form_data = {
@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, GroupAuthor, Post, User
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='test_group_author')
+        cls.other = User.objects.create_user(username='test_group_other')
+        cls.group = Group.objects.create(
+            title='Test group', slug='test-group', description='Description'
+        )
+        cls.empty_group = Group.objects.create(
+            title='Empty group', slug='empty-group', description='Description'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def stats(self, group):
+        group.refresh_from_db()
+        authors = dict(GroupAuthor.objects.filter(
+            group=group
+        ).values_list('author__username', 'posts_count'))
+        return group.posts_count, group.last_post_date, authors
+
+    def test_stats_follow_posts(self):
+        """Сводка группы меняется при создании, переносе и удалении
+        записи."""
+        first = Post.objects.create(
+            author=self.author, group=self.group, text='First'
+        )
+        second = Post.objects.create(
+            author=self.other, group=self.group, text='Second'
+        )
+        self.assertEqual(self.stats(self.group), (2, second.pub_date, {
+            self.author.username: 1, self.other.username: 1,
+        }))
+        second.group = self.empty_group
+        second.save()
+        self.assertEqual(
+            self.stats(self.group),
+            (1, first.pub_date, {self.author.username: 1}),
+        )
+        self.assertEqual(
+            self.stats(self.empty_group),
+            (1, second.pub_date, {self.other.username: 1}),
+        )
+        second.delete()
+        self.assertEqual(self.stats(self.empty_group), (0, None, {}))
+
+    def test_rebuild_command(self):
+        """rebuild_group_stats пересчитывает сводки после bulk_create."""
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text=f'Post {number}')
+            for number in range(3)
+        )
+        self.assertEqual(self.stats(self.group)[0], 0)
+        call_command('rebuild_group_stats', stdout=StringIO())
+        posts_count, last_post_date, authors = self.stats(self.group)
+        self.assertEqual(posts_count, 3)
+        self.assertIsNotNone(last_post_date)
+        self.assertEqual(authors, {self.author.username: 3})
+
+    def test_group_index(self):
+        """Список сообществ упорядочен по последней записи и выводит
+        активных авторов."""
+        for author in (self.author, self.other, self.other):
+            Post.objects.create(author=author, group=self.group, text='Post')
+        response = Client().get(reverse('posts:group_index'))
+        groups = list(response.context['page_obj'])
+        self.assertEqual(groups, [self.group, self.empty_group])
+        self.assertEqual(
+            [stat.author for stat in groups[0].top_authors],
+            [self.other, self.author],
+        )
+        self.assertEqual(groups[1].top_authors, [])
+        self.assertContains(response, 'Записей: 3')
+
+    def test_group_index_follows_author_rename(self):
+        """Каталог групп и страница группы показывают новое имя
+        автора после его изменения."""
+        Post.objects.create(author=self.author, group=self.group, text='Post')
+        urls = [
+            reverse('posts:group_index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+        ]
+        for url in urls:
+            self.client.get(url)
+        self.author.first_name = 'Переименованный'
+        self.author.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Переименованный')
@@ -1,6 +1,10 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-from posts.models import Group, Post, User
+from posts.models import Comment, Follow, Group, Post, User
 from posts.models import FIRST_FIFTEEN_CHARS_OF_TEXT
 
 
@@ -57,3 +61,66 @@ class PostModelTest(TestCase):
                     self.post._meta.get_field(field).help_text,
                     expected_value
                 )
+
+
+class PostIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_reader')
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Test group title',
+            slug='test_group',
+            description='Test group description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Test indexed post',
+        )
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.user,
+            text='Test comment',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент и комментариев читают записи по индексу
+        без сортировки во временном B-дереве."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'posts_' not in sql:
+                    continue
+                plan = self.explain(sql)
+                with self.subTest(url=url, sql=sql):
+                    for step in plan:
+                        if step.startswith('SCAN'):
+                            self.assertIn('INDEX', step)
+                    self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на автора запрещена на уровне БД."""
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=self.user, author=self.author)
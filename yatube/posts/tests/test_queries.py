@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import NUMBER_OF_POSTS
+
+
+class PostsQueriesTests(TestCase):
+    """Число запросов к БД на каждой странице не зависит от
+    количества записей и комментариев на ней."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_reader')
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Test group title',
+            slug='test_group',
+            description='Test group description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Test post text',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        cache.clear()
+
+    def fill_pages(self):
+        """Заполняет страницы лент и комментариев целиком."""
+        for number in range(NUMBER_OF_POSTS + 1):
+            commentator = User.objects.create_user(
+                username=f'test_commentator{Comment.objects.count()}'
+            )
+            Post.objects.create(
+                author=self.author,
+                group=self.group,
+                text=f'Test post {number}',
+            )
+            Comment.objects.create(
+                post=self.post,
+                author=commentator,
+                text=f'Test comment {number}',
+            )
+
+    def assertQueriesBounded(self, client, url, expected, method='get',
+                             data=None):
+        cache.clear()
+        with self.assertNumQueries(expected):
+            getattr(client, method)(url, data)
+        self.fill_pages()
+        cache.clear()
+        with self.assertNumQueries(expected):
+            getattr(client, method)(url, data)
+
+    def test_read_pages_queries(self):
+        """Страницы чтения выполняют постоянное число запросов."""
+        pages = {
+            reverse('posts:index'): 4,
+            reverse('posts:group_list', args=[self.group.slug]): 5,
+            reverse('posts:group_index'): 5,
+            reverse('posts:profile', args=[self.author.username]): 6,
+            reverse('posts:post_detail', args=[self.post.pk]): 5,
+            reverse('posts:post_comments', args=[self.post.pk]): 5,
+            reverse('posts:follow_index'): 4,
+            reverse('posts:search') + '?q=Test': 5,
+            reverse('posts:trending'): 3,
+            reverse('posts:api_index'): 3,
+            reverse('posts:api_group_list', args=[self.group.slug]): 5,
+            reverse('posts:api_profile', args=[self.author.username]): 5,
+            reverse('posts:api_post_detail', args=[self.post.pk]): 5,
+            reverse('posts:api_post_comments', args=[self.post.pk]): 5,
+            reverse('posts:api_follow_index'): 3,
+        }
+        for url, expected in pages.items():
+            with self.subTest(url=url):
+                self.assertQueriesBounded(
+                    self.authorized_client, url, expected
+                )
+
+    # Изменяющие запросы выполняются в транзакции retry_on_busy,
+    # её SAVEPOINT и RELEASE тоже входят в число запросов.
+    def test_post_create_queries(self):
+        """Создание записи выполняет постоянное число запросов."""
+        url = reverse('posts:post_create')
+        self.assertQueriesBounded(self.author_client, url, 3)
+        self.assertQueriesBounded(
+            self.author_client, url, 16, method='post',
+            data={'text': 'New post', 'group': self.group.pk},
+        )
+
+    def test_post_edit_queries(self):
+        """Редактирование записи выполняет постоянное число запросов."""
+        url = reverse('posts:post_edit', args=[self.post.pk])
+        self.assertQueriesBounded(self.author_client, url, 5)
+        self.assertQueriesBounded(
+            self.author_client, url, 12, method='post',
+            data={'text': 'Changed post', 'group': self.group.pk},
+        )
+
+    def test_add_comment_queries(self):
+        """Комментарий добавляется постоянным числом запросов."""
+        self.assertQueriesBounded(
+            self.authorized_client,
+            reverse('posts:add_comment', args=[self.post.pk]),
+            7,
+            method='post',
+            data={'text': 'New comment'},
+        )
+
+    def test_follow_queries(self):
+        """Подписка и отписка выполняют постоянное число запросов."""
+        unfollow_url = reverse(
+            'posts:profile_unfollow', args=[self.author.username]
+        )
+        follow_url = reverse(
+            'posts:profile_follow', args=[self.author.username]
+        )
+        for fill in (False, True):
+            if fill:
+                self.fill_pages()
+            with self.subTest(fill=fill):
+                with self.assertNumQueries(10):
+                    self.authorized_client.get(unfollow_url)
+                with self.assertNumQueries(13):
+                    self.authorized_client.get(follow_url)
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.forms import PostForm
+from posts.models import Comment, Follow, Post, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='test_trending')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.quiet = Post.objects.create(author=cls.author, text='Quiet post')
+        cls.popular = Post.objects.create(
+            author=cls.author, text='Popular post'
+        )
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.popular, author=cls.reader, text=f'Comment {number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def score(self, post):
+        return Post.objects.get(pk=post.pk).trending_score
+
+    def test_scores_updated_on_save(self):
+        """Комментарии и подписчики автора повышают рейтинг записи."""
+        self.assertEqual(self.score(self.quiet), trending.POST_WEIGHT)
+        self.assertEqual(
+            self.score(self.popular),
+            trending.POST_WEIGHT + 3 * trending.COMMENT_WEIGHT,
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Reach post')
+        self.assertEqual(
+            self.score(post), trending.POST_WEIGHT + trending.reach(1)
+        )
+
+    def test_edit_keeps_concurrent_score(self):
+        """Редактирование записи не затирает баллы комментария,
+        добавленного во время запроса."""
+        is_valid = PostForm.is_valid
+
+        def comment_then_validate(form):
+            Post.objects.filter(pk=form.instance.pk).update(
+                trending_score=F('trending_score') + trending.COMMENT_WEIGHT
+            )
+            return is_valid(form)
+
+        client = Client()
+        client.force_login(self.author)
+        with mock.patch.object(PostForm, 'is_valid', comment_then_validate):
+            client.post(
+                reverse('posts:post_edit', args=[self.quiet.pk]),
+                data={'text': 'Edited quiet post'},
+            )
+        post = Post.objects.get(pk=self.quiet.pk)
+        self.assertEqual(post.text, 'Edited quiet post')
+        self.assertEqual(
+            post.trending_score,
+            trending.POST_WEIGHT + trending.COMMENT_WEIGHT,
+        )
+
+    def test_trending_page_ordered_by_score(self):
+        """Страница популярного выводит записи по убыванию рейтинга."""
+        response = Client().get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.popular, self.quiet]
+        )
+
+    def test_decay_command(self):
+        """decay_trending уменьшает рейтинги и сбрасывает страницу."""
+        client = Client()
+        client.get(reverse('posts:trending'))
+        Comment.objects.bulk_create(
+            Comment(post=self.quiet, author=self.reader, text='Comment')
+            for _ in range(5)
+        )
+        Post.objects.filter(pk=self.quiet.pk).update(trending_score=10)
+        call_command(
+            'decay_trending', interval=trending.TRENDING_HALF_LIFE,
+            stdout=StringIO(),
+        )
+        self.assertEqual(self.score(self.quiet), 5)
+        self.assertEqual(self.score(self.popular), 2)
+        response = client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['page_obj'][0], self.quiet)
+
+    def test_rebuild_command(self):
+        """rebuild_trending пересчитывает рейтинги с учётом возраста."""
+        Post.objects.filter(pk=self.quiet.pk).update(
+            pub_date=timezone.now() - timedelta(
+                seconds=trending.TRENDING_HALF_LIFE
+            ),
+            trending_score=0,
+        )
+        call_command('rebuild_trending', stdout=StringIO())
+        self.assertAlmostEqual(
+            self.score(self.quiet), trending.POST_WEIGHT / 2, places=3
+        )
+        self.assertAlmostEqual(
+            self.score(self.popular),
+            trending.POST_WEIGHT + 3 * trending.COMMENT_WEIGHT,
+            places=3,
+        )
@@ -1,15 +1,26 @@
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 from django.core.paginator import Page
-from django.test import Client, TestCase
+from django.db import transaction
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase)
 from django.urls import reverse
 from django.core.cache import cache
+from django.core.management import call_command
+from django.template.loader import render_to_string
 
 from django import forms
 
+from posts.caching import (POSTS_SCOPE, author_scope, bump, get_generations,
+                           group_scope, post_scope)
 from posts.forms import CommentForm, PostForm
-from posts.models import Group, Post, User
-from posts.utils import NUMBER_OF_POSTS
+from posts.models import (Comment, Follow, Group, Post, TimelineEntry,
+                          User)
+from posts.search import Fts5Backend, TableBackend
+from posts.utils import (CursorPage, MAX_PAGES, NUMBER_OF_COMMENTS,
+                         NUMBER_OF_POSTS, WindowPaginator)
 
 
 INDEX_URL = 'posts:index'
@@ -21,6 +32,7 @@ POST_EDIT_URL = 'posts:post_edit'
 FOLLOW_URL = 'posts:profile_follow'
 UNFOLLOW_URL = 'posts:profile_unfollow'
 FOLLOW_INDEX_URL = 'posts:follow_index'
+SEARCH_URL = 'posts:search'
 
 INDEX_TEMPLATE = 'posts/index.html'
 GROUP_TEMPLATE = 'posts/group_list.html'
@@ -29,6 +41,7 @@ POST_DETAIL_TEMPLATE = 'posts/post_detail.html'
 POST_CREATE_TEMPLATE = 'posts/create_post.html'
 POST_EDIT_TEMPLATE = 'posts/create_post.html'
 FOLLOW_INDEX_TEMPLATE = 'posts/follow.html'
+SEARCH_TEMPLATE = 'posts/search.html'
 
 
 class PostsViewsTests(TestCase):
@@ -50,6 +63,7 @@ class PostsViewsTests(TestCase):
                 group=cls.post.group
             ) for i in range(NUMBER_OF_POSTS + 2)
         ])
+        call_command('rebuild_group_stats', stdout=StringIO())
 
     def setUp(self):
         self.unfollowing_user = Client()
@@ -232,19 +246,218 @@ class PostsViewsTests(TestCase):
             self.assertIsInstance(page_obj, Page)
             self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_cursor_pages(self):
+        """Keyset-пагинация index/, group_list/ и profile/ отдаёт
+        страницы по курсору вперёд и назад без пропусков и повторов.
+        """
+        urls = [
+            reverse(INDEX_URL),
+            reverse(GROUP_URL, args=[self.post.group.slug]),
+            reverse(PROFILE_URL, args=[self.post.author])
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                first_page = self.client.get(url + '?cursor=').context[
+                    'page_obj'
+                ]
+                self.assertIsInstance(first_page, CursorPage)
+                self.assertEqual(len(first_page), NUMBER_OF_POSTS)
+                self.assertFalse(first_page.has_previous())
+                second_page = self.client.get(
+                    url + '?cursor=' + first_page.next_cursor
+                ).context['page_obj']
+                self.assertEqual(len(second_page), 3)
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(
+                    {post.pk for post in first_page}
+                    & {post.pk for post in second_page},
+                    set()
+                )
+                previous_page = self.client.get(
+                    url + '?cursor=' + second_page.previous_cursor
+                ).context['page_obj']
+                self.assertEqual(
+                    [post.pk for post in previous_page],
+                    [post.pk for post in first_page]
+                )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Повреждённый курсор открывает первую страницу."""
+        response = self.client.get(reverse(INDEX_URL) + '?cursor=broken')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.context['page_obj']), NUMBER_OF_POSTS)
+
     def test_cache_index_page(self):
-        """Главная страница кешируется."""
+        """Главная страница кешируется до появления новой записи."""
         response1 = self.client.get(reverse(INDEX_URL) + '?page=2')
+        with self.assertNumQueries(0):
+            response2 = self.client.get(reverse(INDEX_URL) + '?page=2')
+        self.assertEqual(response1.content, response2.content)
         Post.objects.create(
             text=self.post.text,
             author=self.post.author,
         )
-        response2 = self.client.get(reverse(INDEX_URL) + '?page=2')
-        self.assertEqual(response1.content, response2.content)
-        cache.clear()
         response3 = self.client.get(reverse(INDEX_URL) + '?page=2')
         self.assertNotEqual(response1.content, response3.content)
 
+    def test_cache_invalidated_by_scope(self):
+        """Кеш страниц группы, профиля и записи сбрасывается только
+        при изменениях в их области."""
+        other_post = Post.objects.create(
+            text='Other author post',
+            author=self.ufollowing_user,
+        )
+        post = Post.objects.filter(author=self.post.author).first()
+        urls = [
+            reverse(GROUP_URL, args=[post.group.slug]),
+            reverse(PROFILE_URL, args=[post.author]),
+            reverse(POST_DETAIL_URL, args=[post.pk]),
+        ]
+        for url in urls:
+            self.client.get(url)
+        other_post.text = 'Changed other author post'
+        other_post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIsNone(response.context)
+        post.text = 'Changed test post text'
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Changed test post text')
+
+    def test_cache_invalidated_by_group_and_author(self):
+        """Переименование группы и изменение автора сбрасывают
+        кеш профиля и страницы записи."""
+        post = Post.objects.filter(author=self.post.author).first()
+        urls = [
+            reverse(PROFILE_URL, args=[post.author]),
+            reverse(POST_DETAIL_URL, args=[post.pk]),
+        ]
+        for url in urls:
+            self.client.get(url)
+        Client().force_login(post.author)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertIsNone(self.client.get(url).context)
+        group = post.group
+        group.slug = 'renamed_group'
+        group.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'renamed_group')
+        author = post.author
+        author.first_name = 'Переименованный'
+        author.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.client.get(url), 'Переименованный'
+                )
+
+    def test_post_cards_cached(self):
+        """Карточки записей берутся из кеша, пока запись не
+        отредактирована."""
+        url = reverse(INDEX_URL)
+        with mock.patch(
+            'posts.cards.render_to_string', wraps=render_to_string
+        ) as render:
+            self.client.get(url)
+            self.assertEqual(render.call_count, NUMBER_OF_POSTS)
+            render.reset_mock()
+            bump(POSTS_SCOPE)
+            self.client.get(url)
+            render.assert_not_called()
+            post = Post.objects.first()
+            self.authorized_post_author.post(
+                reverse(POST_EDIT_URL, args=[post.pk]),
+                data={'text': 'Edited post text', 'group': post.group.pk},
+            )
+            response = self.client.get(url)
+            self.assertEqual(render.call_count, 1)
+        self.assertContains(response, 'Edited post text')
+
+    def test_profile_uses_cached_cards(self):
+        """Профиль выводит те же карточки, что и главная страница."""
+        self.client.get(reverse(INDEX_URL))
+        with mock.patch(
+            'posts.cards.render_to_string', wraps=render_to_string
+        ) as render:
+            response = self.client.get(
+                reverse(PROFILE_URL, args=[self.post.author])
+            )
+        render.assert_not_called()
+        self.assertContains(response, 'подробная информация', NUMBER_OF_POSTS)
+
+    def test_conditional_get(self):
+        """Неизменившаяся страница отдаётся ответом 304 по ETag
+        или Last-Modified."""
+        post = Post.objects.filter(author=self.post.author).first()
+        urls = [
+            reverse(INDEX_URL),
+            reverse(GROUP_URL, args=[post.group.slug]),
+            reverse(PROFILE_URL, args=[post.author]),
+            reverse(POST_DETAIL_URL, args=[post.pk]),
+        ]
+        etags = {}
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                etag = etags[url] = response['ETag']
+                last_modified = response['Last-Modified']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+        with self.assertNumQueries(0):
+            self.client.get(urls[0], HTTP_IF_NONE_MATCH=etags[urls[0]])
+        post.text = 'Changed test post text'
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_last_modified_after_delete_and_follow(self):
+        """Удаление записи и новая подписка обновляют Last-Modified."""
+        index_url = reverse(INDEX_URL)
+        profile_url = reverse(PROFILE_URL, args=[self.post.author])
+        with mock.patch('posts.caching.time.time', return_value=1000000):
+            last_modified = {
+                url: self.client.get(url)['Last-Modified']
+                for url in (index_url, profile_url)
+            }
+        with mock.patch('posts.caching.time.time', return_value=1000100):
+            Post.objects.filter(author=self.post.author).first().delete()
+            self.authorized_client.get(
+                reverse(FOLLOW_URL, args=[self.post.author])
+            )
+        for url in (index_url, profile_url):
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified[url]
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        profile_modified = response['Last-Modified']
+        self.unfollowing_user.get(
+            reverse(FOLLOW_URL, args=[self.post.author])
+        )
+        response = self.client.get(
+            profile_url, HTTP_IF_MODIFIED_SINCE=profile_modified
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
     def test_authorized_user_can_follow_and_unfollow(self):
         """Авторизованный пользователь может подписываться на
         других пользователей и удалять их из подписок."""
@@ -267,6 +480,16 @@ class PostsViewsTests(TestCase):
             follows_before_unfollow - 1
         )
 
+    def test_follow_updates_follower_profile(self):
+        """Подписка сбрасывает кеш профиля подписчика с числом его
+        подписок."""
+        url = reverse(PROFILE_URL, args=[self.user])
+        self.assertContains(self.client.get(url), 'подписок: 0')
+        self.authorized_client.get(
+            reverse(FOLLOW_URL, args=[self.post.author])
+        )
+        self.assertContains(self.client.get(url), 'подписок: 1')
+
     def test_new_post_on_followers_page(self):
         """Новая запись пользователя появляется в ленте тех,
         кто на него подписан и не появляется в ленте тех, кто не подписан."""
@@ -291,3 +514,211 @@ class PostsViewsTests(TestCase):
         )
         context_unfollowing = response_unfollow_user.context['page_obj']
         self.assertEqual(len(context_unfollowing), 0)
+
+    def test_follow_feed_backfill_and_prune(self):
+        """Подписка добавляет в ленту старые записи автора,
+        отписка убирает их."""
+        self.authorized_client.get(
+            reverse(FOLLOW_URL, kwargs={'username': self.post.author})
+        )
+        response = self.authorized_client.get(reverse(FOLLOW_INDEX_URL))
+        self.assertEqual(len(response.context['page_obj']), NUMBER_OF_POSTS)
+        self.assertEqual(
+            response.context['page_obj'][0].author,
+            self.post.author
+        )
+        self.authorized_client.get(
+            reverse(UNFOLLOW_URL, kwargs={'username': self.post.author})
+        )
+        response = self.authorized_client.get(reverse(FOLLOW_INDEX_URL))
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает ленты подписок."""
+        self.authorized_client.get(
+            reverse(FOLLOW_URL, kwargs={'username': self.post.author})
+        )
+        entries_count = TimelineEntry.objects.filter(user=self.user).count()
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(),
+            entries_count
+        )
+        self.assertEqual(entries_count, Post.objects.count())
+
+    def test_comments_paginated(self):
+        """Комментарии на странице записи выводятся страницами от
+        новых к старым, следующие подгружаются по курсору."""
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text=f'Comment {i}')
+            for i in range(NUMBER_OF_COMMENTS + 5)
+        ])
+        response = self.client.get(
+            reverse(POST_DETAIL_URL, args=[self.post.pk])
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), NUMBER_OF_COMMENTS)
+        self.assertEqual(comments[0].text, f'Comment {NUMBER_OF_COMMENTS + 4}')
+        self.assertTrue(comments.has_next())
+        urls = [
+            reverse(POST_DETAIL_URL, args=[self.post.pk])
+            + f'?comments={comments.next_cursor}',
+            reverse('posts:post_comments', args=[self.post.pk])
+            + f'?cursor={comments.next_cursor}',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                older = self.client.get(url).context['comments']
+                self.assertEqual(
+                    [comment.text for comment in older],
+                    [f'Comment {i}' for i in range(4, -1, -1)],
+                )
+                self.assertFalse(older.has_next())
+        response = self.client.get(
+            reverse('posts:api_post_comments', args=[self.post.pk]),
+            {'cursor': comments.next_cursor},
+        )
+        self.assertEqual(len(response.json()['results']), 5)
+
+
+class PageCacheCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generations_bumped_after_commit(self):
+        """Поколения меняются и после COMMIT: страница, собранная по
+        данным до фиксации, не остаётся в кеше."""
+        author = User.objects.create_user(username='test_author')
+        reader = User.objects.create_user(username='test_reader')
+        old_group = Group.objects.create(title='Old', slug='old_group')
+        post = Post.objects.create(
+            author=author, group=old_group, text='Test post text'
+        )
+        new_group = Group.objects.create(title='New', slug='new_group')
+
+        def move_post():
+            post.group = new_group
+            post.save()
+
+        writes = {
+            'post': (move_post, [
+                POSTS_SCOPE, group_scope(old_group.pk), post_scope(post.pk)
+            ]),
+            'comment': (lambda: Comment.objects.create(
+                post=post, author=reader, text='Test comment'
+            ), [post_scope(post.pk)]),
+            'follow': (lambda: Follow.objects.create(
+                user=reader, author=author
+            ), [author_scope(author.pk), author_scope(reader.pk)]),
+        }
+        for name, (write, scopes) in writes.items():
+            with self.subTest(write=name):
+                with transaction.atomic():
+                    write()
+                    before_commit = get_generations(scopes)
+                after_commit = get_generations(scopes)
+                for before, after in zip(before_commit, after_commit):
+                    self.assertNotEqual(before, after)
+
+
+class PostsSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='test_search_author')
+        cls.rare_post = Post.objects.create(
+            author=author,
+            text='Котики любят молоко',
+        )
+        cls.frequent_post = Post.objects.create(
+            author=author,
+            text='Котики, котики и ещё раз котики',
+        )
+        Post.objects.create(author=author, text='Собаки любят кости')
+
+    def search(self, query):
+        response = self.client.get(reverse(SEARCH_URL), {'q': query})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(response, SEARCH_TEMPLATE)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_search_backends(self):
+        """Поиск находит записи со всеми словами запроса,
+        более релевантные выше, и следит за изменениями записей."""
+        for backend in (Fts5Backend(), TableBackend()):
+            with self.subTest(backend=backend):
+                with mock.patch('posts.search._backend', backend):
+                    for post in Post.objects.all():
+                        backend.index(post)
+                    self.assertEqual(
+                        self.search('котики'),
+                        [self.frequent_post.pk, self.rare_post.pk]
+                    )
+                    self.assertEqual(
+                        self.search('любят КОТИКИ'), [self.rare_post.pk]
+                    )
+                    self.assertEqual(self.search('хомяки'), [])
+                    self.assertEqual(self.search(''), [])
+                    post = Post.objects.get(pk=self.rare_post.pk)
+                    post.text = 'Хомяки любят молоко'
+                    post.save()
+                    self.assertEqual(
+                        self.search('хомяки'), [self.rare_post.pk]
+                    )
+                    post.text = self.rare_post.text
+                    post.save()
+                    self.frequent_post.delete()
+                    self.assertEqual(
+                        self.search('котики'), [self.rare_post.pk]
+                    )
+                    self.frequent_post.save()
+                    backend.clear()
+
+    def test_search_pagination(self):
+        """Результаты поиска разбиты на страницы с сохранением запроса."""
+        Post.objects.bulk_create([
+            Post(author=self.rare_post.author, text='Котики')
+            for _ in range(NUMBER_OF_POSTS)
+        ])
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = self.client.get(reverse(SEARCH_URL), {'q': 'котики'})
+        self.assertEqual(len(response.context['page_obj']), NUMBER_OF_POSTS)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            NUMBER_OF_POSTS + 2
+        )
+        self.assertContains(response, 'href="?q=%D0%BA%D0%BE%D1%82%D0%B8')
+        response = self.client.get(
+            reverse(SEARCH_URL), {'q': 'котики', 'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+        response = self.client.get(
+            reverse(SEARCH_URL), {'q': 'котики', 'cursor': ''}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.context['page_obj']), NUMBER_OF_POSTS)
+
+
+class WindowPaginatorTests(SimpleTestCase):
+    def test_page_window(self):
+        """Ссылки выводятся только на крайние страницы и соседние
+        с текущей, номер страницы ограничен MAX_PAGES."""
+        paginator = WindowPaginator([], NUMBER_OF_POSTS, count=500000)
+        self.assertEqual(paginator.num_pages, MAX_PAGES)
+        pages = {
+            1: [1, 2, 3, None, MAX_PAGES],
+            4: [1, 2, 3, 4, 5, 6, None, MAX_PAGES],
+            500: [1, None, 498, 499, 500, 501, 502, None, MAX_PAGES],
+            MAX_PAGES * 2: [1, None, MAX_PAGES - 2, MAX_PAGES - 1, MAX_PAGES],
+        }
+        for number, expected in pages.items():
+            with self.subTest(number=number):
+                page = paginator.get_page(number)
+                self.assertEqual(page.page_window(), expected)
+        html = render_to_string(
+            'posts/includes/paginator.html',
+            {'page_obj': paginator.get_page(500)},
+        )
+        self.assertEqual(html.count('class="page-item'), 13)
+        self.assertIn('page=1000', html)
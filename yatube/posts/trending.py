@@ -0,0 +1,93 @@
+import math
+
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import Profile
+
+from .bulk import BULK_CHUNK_SIZE, chunked
+from .models import Comment, Post
+
+
+TRENDING_SIZE = 20
+# За это время вклад любого события в рейтинг уменьшается вдвое.
+TRENDING_HALF_LIFE = 60 * 60 * 12
+# Интервал запуска decay_trending по умолчанию.
+TRENDING_DECAY_INTERVAL = 60 * 60
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+REACH_WEIGHT = 0.5
+# Меньшие рейтинги обнуляются, чтобы старые записи не висели
+# в хвосте индекса бесконечно малыми числами.
+MIN_SCORE = 0.001
+
+
+def decay_factor(seconds, half_life=TRENDING_HALF_LIFE):
+    return 0.5 ** (seconds / half_life)
+
+
+def reach(followers_count):
+    """Охват автора растёт медленнее числа подписчиков."""
+    return REACH_WEIGHT * math.log2(1 + followers_count)
+
+
+def initial_score(author_id):
+    followers_count = Profile.objects.filter(
+        user_id=author_id
+    ).values_list('followers_count', flat=True).first()
+    return POST_WEIGHT + reach(followers_count or 0)
+
+
+def count_comment(post_id):
+    Post.objects.filter(pk=post_id).update(
+        trending_score=F('trending_score') + COMMENT_WEIGHT
+    )
+
+
+def decay(seconds=TRENDING_DECAY_INTERVAL, half_life=TRENDING_HALF_LIFE):
+    """Уменьшает все рейтинги так, как если бы прошло seconds
+    секунд. Возвращает число изменённых записей."""
+    scored = Post.objects.filter(trending_score__gt=0)
+    scored.filter(trending_score__lt=MIN_SCORE).update(trending_score=0)
+    return scored.update(
+        trending_score=F('trending_score') * decay_factor(seconds, half_life)
+    )
+
+
+def rebuild(half_life=TRENDING_HALF_LIFE):
+    """Пересчитывает рейтинги с нуля: каждая запись и каждый
+    комментарий дают свой вес, уменьшенный по возрасту."""
+    now = timezone.now()
+
+    def aged(weight, date):
+        return weight * decay_factor((now - date).total_seconds(), half_life)
+
+    scores = {}
+    for post_id, created in Comment.objects.values_list(
+        'post_id', 'created'
+    ).iterator(chunk_size=BULK_CHUNK_SIZE):
+        scores[post_id] = scores.get(post_id, 0) + aged(
+            COMMENT_WEIGHT, created
+        )
+    posts = Post.objects.values_list(
+        'pk', 'pub_date', 'author__profile__followers_count'
+    ).order_by().iterator(chunk_size=BULK_CHUNK_SIZE)
+    rebuilt = 0
+    for chunk in chunked(posts):
+        updated = []
+        for pk, pub_date, followers_count in chunk:
+            score = scores.get(pk, 0) + aged(
+                POST_WEIGHT + reach(followers_count or 0), pub_date
+            )
+            updated.append(Post(
+                pk=pk, trending_score=score if score >= MIN_SCORE else 0
+            ))
+        Post.objects.bulk_update(updated, ['trending_score'])
+        rebuilt += len(chunk)
+    return rebuilt
+
+
+def top_posts(size=TRENDING_SIZE):
+    return Post.objects.select_related('author', 'group').order_by(
+        '-trending_score', '-pk'
+    )[:size]
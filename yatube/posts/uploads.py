@@ -0,0 +1,26 @@
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from .images import IMAGE_MAX_BYTES
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загружаемый файл во временный файл на диске по частям.
+
+    Части сверх IMAGE_MAX_BYTES отбрасываются, но полный размер
+    файла сохраняется в size, чтобы форма вернула понятную ошибку,
+    а не «повреждённое изображение».
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= IMAGE_MAX_BYTES:
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.size = file_size
+        return file
@@ -1,10 +1,201 @@
-from django.core.paginator import Paginator
+from collections.abc import Sequence
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 
 
 NUMBER_OF_POSTS = 10
+NUMBER_OF_COMMENTS = 20
+NUMBER_OF_GROUPS = 20
+# Ссылки на соседние страницы по обе стороны от текущей и на
+# крайние страницы, остальные заменяются многоточием.
+PAGE_WINDOW = 2
+PAGE_EDGES = 1
+# Дальше этой страницы OFFSET слишком дорог: глубже листают
+# по курсору (?cursor=).
+MAX_PAGES = 1000
+CURSOR_PARAM = 'cursor'
+COMMENTS_CURSOR_PARAM = 'comments'
+NEXT = 'n'
+PREVIOUS = 'p'
 
 
-def get_pages(request, post_list):
-    paginator = Paginator(post_list, NUMBER_OF_POSTS)
+def get_pages(request, post_list, count=None):
+    """count - заранее известное число записей, например из сводки
+    группы: с ним пагинатор не выполняет COUNT(*)."""
+    if CURSOR_PARAM in request.GET:
+        return get_cursor_page(request, post_list)
+    paginator = WindowPaginator(post_list, NUMBER_OF_POSTS, count=count)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def elided_page_range(number, num_pages, window=PAGE_WINDOW,
+                      edges=PAGE_EDGES):
+    """Номера страниц для ссылок: edges крайних с каждой стороны
+    и window вокруг текущей; пропуски обозначаются None."""
+    pages = sorted(
+        set(range(1, min(edges, num_pages) + 1))
+        | set(range(max(number - window, 1),
+                    min(number + window, num_pages) + 1))
+        | set(range(max(num_pages - edges + 1, 1), num_pages + 1))
+    )
+    previous = 0
+    for page in pages:
+        # Многоточие вместо единственной пропущенной страницы
+        # не короче самой ссылки.
+        if page - previous == 2:
+            yield previous + 1
+        elif page - previous > 2:
+            yield None
+        yield page
+        previous = page
+
+
+class WindowPage(Page):
+    def page_window(self):
+        return list(elided_page_range(self.number, self.paginator.num_pages))
+
+
+class WindowPaginator(Paginator):
+    """Пагинатор с окном ссылок вместо списка всех страниц и
+    ограничением max_pages на последнюю доступную страницу.
+
+    Если число объектов уже известно, его передают в count, и
+    COUNT(*) не выполняется.
+    """
+
+    def __init__(self, object_list, per_page, count=None,
+                 max_pages=MAX_PAGES, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+        self.max_pages = max_pages
+
+    @cached_property
+    def num_pages(self):
+        num_pages = super().num_pages
+        if self.max_pages:
+            return min(num_pages, self.max_pages)
+        return num_pages
+
+    def _get_page(self, *args, **kwargs):
+        return WindowPage(*args, **kwargs)
+
+
+def get_cursor_page(request, post_list, field='pub_date'):
+    paginator = CursorPaginator(post_list, NUMBER_OF_POSTS, field)
+    return paginator.get_page(request.GET.get(CURSOR_PARAM))
+
+
+def get_comments_page(request, comments, param=COMMENTS_CURSOR_PARAM):
+    """Страница комментариев от новых к старым: на странице записи
+    курсор передаётся в ?comments=, чтобы не мешать другим параметрам."""
+    paginator = CursorPaginator(comments, NUMBER_OF_COMMENTS, 'created')
+    return paginator.get_page(request.GET.get(param))
+
+
+def encode_cursor(direction, value, pk):
+    return urlsafe_base64_encode(
+        force_bytes(f'{direction}|{value.isoformat()}|{pk}')
+    )
+
+
+def decode_cursor(cursor):
+    """Возвращает (направление, значение, pk) или None для
+    пустого и повреждённого курсора."""
+    if not cursor:
+        return None
+    try:
+        direction, value, pk = force_str(
+            urlsafe_base64_decode(cursor)
+        ).split('|')
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or value is None:
+        return None
+    return direction, value, pk
+
+
+class CursorPage(Sequence):
+    """Страница keyset-пагинации: без общего количества записей,
+    только ссылки на соседние страницы."""
+    cursor_mode = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по (field, pk) от новых записей к старым:
+    вместо COUNT(*) и OFFSET - выборка по индексу от курсора."""
+
+    def __init__(self, object_list, per_page, field='pub_date'):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.field = field
+
+    def get_page(self, cursor):
+        position = decode_cursor(cursor)
+        if position is None:
+            items, has_more = self._fetch(self.object_list, descending=True)
+            return self._page(items, has_more, has_previous=False)
+        direction, value, pk = position
+        if direction == NEXT:
+            queryset = self.object_list.filter(
+                Q(**{f'{self.field}__lt': value})
+                | Q(**{self.field: value, 'pk__lt': pk})
+            )
+            items, has_more = self._fetch(queryset, descending=True)
+            return self._page(items, has_more, has_previous=True)
+        queryset = self.object_list.filter(
+            Q(**{f'{self.field}__gt': value})
+            | Q(**{self.field: value, 'pk__gt': pk})
+        )
+        items, has_more = self._fetch(queryset, descending=False)
+        items.reverse()
+        return self._page(items, has_next=True, has_previous=has_more)
+
+    def _fetch(self, queryset, descending):
+        prefix = '-' if descending else ''
+        items = list(queryset.order_by(
+            f'{prefix}{self.field}', f'{prefix}pk'
+        )[:self.per_page + 1])
+        return items[:self.per_page], len(items) > self.per_page
+
+    def _page(self, items, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = self._cursor(NEXT, items[-1])
+        if items and has_previous:
+            previous_cursor = self._cursor(PREVIOUS, items[0])
+        return CursorPage(items, next_cursor, previous_cursor)
+
+    def _cursor(self, direction, item):
+        # Строки values() приходят словарями, а не моделями.
+        if isinstance(item, dict):
+            return encode_cursor(direction, item[self.field], item['pk'])
+        return encode_cursor(direction, getattr(item, self.field), item.pk)
@@ -1,13 +1,24 @@
 from django.contrib.auth.decorators import login_required
+from django.db.models import Exists, F, OuterRef
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
+from django.utils.http import urlencode
 
+from core.db import retry_on_busy
+
+from .caching import (cache_page_by_generation, group_index_scopes,
+                      group_scopes, index_scopes, post_detail_scopes,
+                      profile_scopes, TRENDING_CACHE_TIMEOUT, trending_scopes)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, Comment, User, Follow
-from .utils import get_pages
+from .group_stats import top_authors
+from .images import schedule_thumbnail
+from .models import Group, Post, Comment, User, Follow, TimelineEntry
+from .search import SearchResults
+from .trending import top_posts
+from .utils import (CURSOR_PARAM, NUMBER_OF_GROUPS, NUMBER_OF_POSTS,
+                    WindowPaginator, get_comments_page, get_pages)
 
 
-@cache_page(20, key_prefix='index_page')
+@cache_page_by_generation(index_scopes, last_modified=True)
 def index(request):
     posts = Post.objects.select_related(
         'author').select_related(
@@ -16,10 +27,20 @@ def index(request):
     return render(request, 'posts/index.html', {'page_obj': page_obj})
 
 
+@cache_page_by_generation(trending_scopes, TRENDING_CACHE_TIMEOUT)
+def trending(request):
+    context = {
+        'page_obj': top_posts(),
+        'trending': True,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+@cache_page_by_generation(group_scopes, last_modified=True)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = get_pages(request, posts)
+    posts = group.posts.select_related('author', 'group')
+    page_obj = get_pages(request, posts, count=group.posts_count)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -27,30 +48,48 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_page_by_generation(group_index_scopes)
+def group_index(request):
+    groups = Group.objects.order_by(
+        F('last_post_date').desc(nulls_last=True), 'title'
+    )
+    page_obj = WindowPaginator(groups, NUMBER_OF_GROUPS).get_page(
+        request.GET.get('page')
+    )
+    authors = top_authors([group.pk for group in page_obj])
+    for group in page_obj:
+        group.top_authors = authors[group.pk]
+    return render(request, 'posts/group_index.html', {'page_obj': page_obj})
+
+
+@cache_page_by_generation(profile_scopes, last_modified=True)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    authors = User.objects.select_related('profile')
+    if request.user.is_authenticated:
+        # Статус подписки приходит в том же запросе, что и автор.
+        authors = authors.annotate(is_followed=Exists(Follow.objects.filter(
+            user=request.user, author=OuterRef('pk')
+        )))
+    author = get_object_or_404(authors, username=username)
+    posts = author.posts.select_related('group')
     page_obj = get_pages(request, posts)
     context = {
-                'author': author,
-                'page_obj': page_obj,
-            }
-    if request.user.is_authenticated:
-        follower = Follow.objects.filter(user=request.user,author=author).exists()
-        if not follower:
-            return render(request, 'posts/profile.html', context)
-        context = {
-            'author': author,
-            'page_obj': page_obj,
-            'following': True,
-        }
-        return render(request, 'posts/profile.html', context)
+        'author': author,
+        'page_obj': page_obj,
+        'following': getattr(author, 'is_followed', False),
+    }
     return render(request, 'posts/profile.html', context)
 
 
+@cache_page_by_generation(post_detail_scopes, last_modified=True)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group'),
+        pk=post_id
+    )
+    comments = get_comments_page(
+        request, post.comments.select_related('author')
+    )
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
@@ -60,7 +99,36 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@cache_page_by_generation(post_detail_scopes)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = get_comments_page(
+        request, post.comments.select_related('author'), CURSOR_PARAM
+    )
+    context = {
+        'post': post,
+        'comments': comments,
+        'fragment': True,
+    }
+    return render(request, 'includes/comments_list.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    # Результаты упорядочены по релевантности, а не по дате,
+    # поэтому курсорная навигация к ним не применяется.
+    paginator = WindowPaginator(SearchResults(query), NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_query': urlencode({'q': query}) + '&',
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@retry_on_busy
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -71,10 +139,12 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    schedule_thumbnail(post)
     return redirect('posts:profile', username=request.user)
 
 
 @login_required
+@retry_on_busy
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
@@ -87,13 +157,17 @@ def post_edit(request, post_id):
     if not form.is_valid():
         context = {'form': form, 'is_edit': True}
         return render(request, 'posts/create_post.html', context)
-    post = form.save()
-    post.author = request.user
-    post.save()
+    post = form.save(commit=False)
+    # Полный UPDATE вернул бы trending_score, прочитанный в начале
+    # запроса, и затёр бы баллы комментариев, добавленных за это время.
+    post.save(update_fields=[*form._meta.fields, 'updated'])
+    if 'image' in form.changed_data:
+        schedule_thumbnail(post)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
+@retry_on_busy
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -108,8 +182,11 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_pages(request, posts)
+    entries = TimelineEntry.objects.filter(
+        user=request.user
+    ).select_related('post__author', 'post__group')
+    page_obj = get_pages(request, entries)
+    page_obj.object_list = [entry.post for entry in page_obj]
     context = {
         'page_obj': page_obj,
     }
@@ -117,16 +194,16 @@ def follow_index(request):
 
 
 @login_required
+@retry_on_busy(safe_methods=True)
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.create(user=request.user, author=author)
+    Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@retry_on_busy(safe_methods=True)
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    following = Follow.objects.filter(user=request.user, author=author)
-    if following.exists():
-        following.delete()
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
@@ -0,0 +1,16 @@
+// Подгружает следующую страницу комментариев без перезагрузки:
+// ссылка заменяется фрагментом с комментариями и новой ссылкой.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('[data-fragment]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.fragment)
+    .then(function (response) { return response.text(); })
+    .then(function (html) {
+      var fragment = document.createElement('div');
+      fragment.innerHTML = html;
+      link.replaceWith.apply(link, fragment.firstElementChild.children);
+    });
+});
@@ -0,0 +1,52 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Profile, User
+
+
+def change(user_id, field, delta):
+    """Атомарно меняет счётчик профиля, не опуская его ниже нуля."""
+    profiles = Profile.objects.filter(user_id=user_id)
+    if delta < 0:
+        profiles = profiles.filter(**{f'{field}__gte': -delta})
+    profiles.update(**{field: F(field) + delta})
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('user_id')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def reconcile():
+    """Создаёт недостающие профили и исправляет разошедшиеся
+    счётчики. Возвращает число исправленных профилей."""
+    from posts.models import Follow, Post
+
+    Profile.objects.bulk_create(
+        (
+            Profile(user_id=user_id)
+            for user_id in User.objects.filter(
+                profile__isnull=True
+            ).values_list('pk', flat=True).iterator()
+        ),
+    )
+    actual = Profile.objects.annotate(
+        actual_posts=_count(Post, 'author'),
+        actual_followers=_count(Follow, 'author'),
+        actual_following=_count(Follow, 'user'),
+    ).exclude(
+        posts_count=F('actual_posts'),
+        followers_count=F('actual_followers'),
+        following_count=F('actual_following'),
+    )
+    fixed = 0
+    for profile in actual.iterator():
+        Profile.objects.filter(pk=profile.pk).update(
+            posts_count=profile.actual_posts,
+            followers_count=profile.actual_followers,
+            following_count=profile.actual_following,
+        )
+        fixed += 1
+    return fixed
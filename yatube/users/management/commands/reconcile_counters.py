@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from users import counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики записей, подписчиков и подписок '
+            'в профилях пользователей.')
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile()
+        self.stdout.write(f'Исправлено профилей: {fixed}')
@@ -1 +1,55 @@
-# from django.test import TestCase
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Follow, Post
+from users.models import Profile, User
+
+
+class ProfileCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_follower')
+        cls.author = User.objects.create_user(username='test_author')
+
+    def assertCounters(self, user, posts, followers, following):
+        profile = Profile.objects.get(user=user)
+        self.assertEqual(
+            (
+                profile.posts_count,
+                profile.followers_count,
+                profile.following_count,
+            ),
+            (posts, followers, following)
+        )
+
+    def test_post_counter(self):
+        """Счётчик записей меняется при создании и удалении записи."""
+        post = Post.objects.create(author=self.author, text='Test post')
+        self.assertCounters(self.author, 1, 0, 0)
+        post.delete()
+        self.assertCounters(self.author, 0, 0, 0)
+
+    def test_follow_counters(self):
+        """Счётчики подписчиков и подписок меняются при подписке
+        и отписке."""
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertCounters(self.author, 0, 1, 0)
+        self.assertCounters(self.user, 0, 0, 1)
+        follow.delete()
+        self.assertCounters(self.author, 0, 0, 0)
+        self.assertCounters(self.user, 0, 0, 0)
+
+    def test_reconcile_counters_command(self):
+        """Команда reconcile_counters исправляет расхождения
+        и создаёт недостающие профили."""
+        Post.objects.bulk_create([
+            Post(author=self.author, text='Test post') for _ in range(3)
+        ])
+        Follow.objects.create(user=self.user, author=self.author)
+        Profile.objects.filter(user=self.user).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertCounters(self.author, 3, 1, 0)
+        self.assertCounters(self.user, 0, 0, 1)
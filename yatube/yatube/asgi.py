@@ -0,0 +1,19 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 has no native ASGI handler, so the WSGI application is
+served through asgiref's WsgiToAsgi adapter: each request runs in the
+adapter's thread pool and a slow request does not block the event
+loop of the ASGI server (uvicorn, daphne).
+
+    uvicorn yatube.asgi:application --workers 4
+"""
+
+import os
+
+from asgiref.wsgi import WsgiToAsgi
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiToAsgi(get_wsgi_application())
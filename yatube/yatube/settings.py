@@ -14,6 +14,10 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
@@ -36,6 +40,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'core.middleware.TemplateProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -47,6 +54,10 @@ MIDDLEWARE = [
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Миниатюры картинок записей создаются в фоновом пуле потоков.
+POST_THUMBNAILS_ASYNC = True
+# Загрузки сразу пишутся во временный файл на диске, а не в память.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.LimitedUploadHandler']
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 LOGIN_URL = 'users:login'
@@ -56,6 +67,9 @@ ROOT_URLCONF = 'yatube.urls'
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Каталог для стеков профилировщика шаблонов; пусто - выключен.
+# Отчёт: python manage.py template_profile.
+TEMPLATE_PROFILE_DIR = os.environ.get('YATUBE_TEMPLATE_PROFILE', '')
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -74,19 +88,93 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Прогрев воркера при загрузке yatube/wsgi.py, см. core/warmup.py.
+WARMUP_ON_START = os.environ.get('YATUBE_WARMUP') == '1'
+
+# Настройки каждого соединения SQLite: WAL не блокирует чтения во
+# время записи, а писатели ждут друг друга busy_timeout мс вместо
+# немедленной ошибки database is locked; движок core.backends.sqlite3
+# начинает транзакции с BEGIN IMMEDIATE. YATUBE_SQLITE_TUNING=0
+# отключает обе настройки, например для сравнения в бенчмарке.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+SQLITE_ENGINE = 'core.backends.sqlite3'
+if os.environ.get('YATUBE_SQLITE_TUNING') == '0':
+    SQLITE_PRAGMAS = {}
+    SQLITE_ENGINE = 'django.db.backends.sqlite3'
+
+# Постоянные соединения: не открывать новое на каждый запрос.
+CONN_MAX_AGE = int(os.environ.get('YATUBE_CONN_MAX_AGE', 60))
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': SQLITE_ENGINE,
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
     }
 }
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Реплики только для чтения: YATUBE_DB_REPLICAS - пути к копиям
+# базы через запятую, их обновляет команда sync_replicas.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': SQLITE_ENGINE,
+        'NAME': name,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Сколько секунд после записи клиент читает с основной БД.
+DATABASE_REPLICA_LAG = 5
+
+# Общий кеш процессов выбирается переменными окружения:
+# YATUBE_CACHE_BACKEND = locmem | file | memcached | redis.
+# Для всех, кроме locmem, перед ним ставится LRU в памяти процесса.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+CACHE_DEFAULT_LOCATIONS = {
+    'locmem': '',
+    'file': os.path.join(BASE_DIR, 'cache'),
+    'memcached': '127.0.0.1:11211',
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE_BACKEND', 'locmem')
+SHARED_CACHE = {
+    'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+    'LOCATION': os.environ.get(
+        'YATUBE_CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND]
+    ),
+}
+if CACHE_BACKEND in ('locmem', 'file'):
+    SHARED_CACHE['OPTIONS'] = {'MAX_ENTRIES': 10000}
+if CACHE_BACKEND == 'locmem':
+    CACHES = {'default': SHARED_CACHE}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TwoTierCache',
+            'OPTIONS': {
+                'SHARED': 'shared',
+                'LOCAL_MAX_BYTES': 16 * 1024 * 1024,
+            },
+        },
+        'shared': SHARED_CACHE,
     }
-} 
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,35 @@
+"""Настройки для боевого запуска:
+
+    DJANGO_SETTINGS_MODULE=yatube.settings_production \
+    YATUBE_SECRET_KEY=... gunicorn yatube.wsgi:application
+"""
+import copy
+import os
+
+from . import settings as base
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+# Без ключа запуск должен падать: ключ из репозитория известен всем.
+SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+ALLOWED_HOSTS = os.environ.get(
+    'YATUBE_ALLOWED_HOSTS', 'localhost,127.0.0.1'
+).split(',')
+
+# Шаблоны компилируются один раз на процесс и дальше берутся из
+# памяти; файлы шаблонов после запуска не перечитываются.
+TEMPLATES = copy.deepcopy(base.TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['context_processors'].remove(
+    'django.template.context_processors.debug'
+)
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# Воркер прогревается в yatube/wsgi.py до первого запроса.
+WARMUP_ON_START = os.environ.get('YATUBE_WARMUP', '1') == '1'
@@ -3,14 +3,25 @@ WSGI config for yatube project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+With WARMUP_ON_START (on in yatube.settings_production) the worker
+compiles templates, builds the URL resolver and primes the page cache
+before it returns the application, so the first real requests do not
+pay for it.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 """
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.WARMUP_ON_START:
+    from core.warmup import warm_up
+
+    warm_up(application)